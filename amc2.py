@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
+from amccore import find_header_row
 
 # Fonction de traitement pour le fichier Excel MODIFIÉE
 def process_excel(file):
@@ -9,11 +10,7 @@ def process_excel(file):
         df = pd.read_excel(file, header=None)
         
         # Trouver l'index de la ligne d'en-tête
-        header_index = None
-        for idx, row in df.iterrows():
-            if all(col in row.values for col in ['Code', 'Nom', 'Prénom']):
-                header_index = idx
-                break
+        header_index = find_header_row(df)
         
         if header_index is None:
             st.error("Les colonnes 'Code', 'Nom', 'Prénom' sont introuvables dans le fichier.")
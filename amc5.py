@@ -1,24 +1,26 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
+from amccore import read_roster
+
+# Lecture unique du fichier Excel de l'administration
+def load_roster(file):
+    try:
+        return read_roster(file)
+
+    except Exception as e:
+        st.error(f"Erreur lors du traitement du fichier Excel : {str(e)}")
+        st.info("Assurez-vous que le fichier est bien formaté et contient les colonnes requises.")
+        return None
 
 # Fonction de traitement pour le fichier Excel
-def process_excel(file):
+def process_excel(roster):
     try:
-        # Lire le fichier Excel sans header
-        df = pd.read_excel(file, header=None)
-        
-        # Trouver l'index de la ligne d'en-tête
-        header_index = next((idx for idx, row in df.iterrows() 
-                             if all(col in row.values for col in ['Code', 'Nom', 'Prénom'])), None)
-        
-        if header_index is None:
-            st.error("Les colonnes 'Code', 'Nom', 'Prénom' sont introuvables dans le fichier.")
+        if roster is None:
             return None
-        
-        # Redéfinir les en-têtes et supprimer les lignes précédentes
-        df.columns = df.iloc[header_index]
-        df = df.iloc[header_index + 1:].reset_index(drop=True)
+
+        # En-têtes déjà détectés lors de la lecture du fichier
+        df = roster.data
         
         # Vérification si le fichier est vide après nettoyage
         if df.empty:
@@ -49,26 +51,13 @@ def process_excel(file):
 
 
 # Fonction de traitement pour le fichier CSV
-def process_csv(excel_file, csv_file):
+def process_csv(roster, csv_file):
     try:
-        # Lire le fichier Excel sans header
-        df_xls = pd.read_excel(excel_file, header=None)
+        # Fichier Excel déjà lu : lignes d'étudiants et lignes avant l'en-tête
+        df_xls = roster.data
+        dm_xls = roster.preamble.set_axis(roster.header, axis=1)
         df_csv = pd.read_csv(csv_file, delimiter=';', encoding='utf-8')
         
-        # Trouver l'index de la ligne d'en-tête
-        header_index = next((idx for idx, row in df_xls.iterrows() 
-                             if all(col in row.values for col in ['Code', 'Nom', 'Prénom'])), None)
-        
-        if header_index is None:
-            st.error("Les colonnes 'Code', 'Nom', 'Prénom' sont introuvables dans le fichier.")
-            return None, None
-        
-        # Redéfinir les en-têtes et supprimer les lignes précédentes
-        df_xls.columns = df_xls.iloc[header_index]
-        dm_xls = df_xls.iloc[:header_index]
-        df_xls = df_xls.iloc[header_index + 1:].reset_index(drop=True)
-        
-        
         # Vérification si le fichier est vide après nettoyage
         if df_xls.empty:
             st.error("Aucune donnée valide après le traitement des lignes.")
@@ -169,7 +158,7 @@ with tab1:
     
     if uploaded_excel_file is not None:
         with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            processed_data = process_excel(uploaded_excel_file)
+            processed_data = process_excel(load_roster(uploaded_excel_file))
             
             if processed_data is not None:
                 st.success(f"Lecture du fichier Excel réussie ! {len(processed_data)} étudiants trouvés.")
@@ -205,7 +194,8 @@ with tab2:
 
     if uploaded_excel_file2 is not None:
         with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            processed_data = process_excel(uploaded_excel_file2)
+            roster = load_roster(uploaded_excel_file2)
+            processed_data = process_excel(roster)
             
             if processed_data is not None:
                 st.success(f"Le fichier Excel de l'administration contient {len(processed_data)} étudiants.")
@@ -217,16 +207,12 @@ with tab2:
         key="csv_uploader"
     )
 
-    if uploaded_excel_file2 is not None:
-        with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            processed_data = process_excel(uploaded_excel_file2)
-            
-            if processed_data is not None:
-                st.success(f"{len(processed_data)} étudiants ont passé l'examen.")
+    if uploaded_excel_file2 is not None and processed_data is not None:
+        st.success(f"{len(processed_data)} étudiants ont passé l'examen.")
     
     if uploaded_csv_file is not None and uploaded_excel_file2 is not None:
         with st.spinner("Intégration des notes aux étudiants..."):
-            final_data, anomalies2 = process_csv(uploaded_excel_file2, uploaded_csv_file)
+            final_data, anomalies2 = process_csv(roster, uploaded_csv_file)
             
             if final_data is not None and anomalies2 is not None:
                 st.success("Fusion réussie !")
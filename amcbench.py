@@ -0,0 +1,291 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from amccore import read_roster, read_scores, split_scores, merge_notes, write_excel, NOTES_HEADERS, SCORES_CHUNKSIZE
+
+
+# Export AMC synthétique : codes, notes sur 20 et `n_questions` colonnes de
+# score par question. Proportions de copies en anomalie :
+# - none_rate : copies 'NONE'
+# - mismatch_rate : code lu ('Code') différent de l'association ('A:Code')
+# - duplicate_rate : copies associées au code d'un autre étudiant
+# Les noms correspondent à ceux de make_roster_workbook.
+def make_scores_csv(n_students, n_questions=20, none_rate=0.02, mismatch_rate=0.0, duplicate_rate=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+
+    ids = np.arange(100000, 100000 + n_students)
+    codes = ids.astype(str).astype(object)
+    none = rng.random(n_students) < none_rate
+    codes[none] = 'NONE'
+
+    csv = pd.DataFrame({
+        'A:Code': codes,
+        'Code': ids,
+        'Nom': [f"NOM{i} PRENOM{i}" for i in range(n_students)],
+        'Note': np.round(rng.uniform(0, 20, n_students) * 4) / 4,
+    })
+    questions = pd.DataFrame(rng.integers(0, 2, (n_students, n_questions)),
+                             columns=[f"Q{q + 1}" for q in range(n_questions)])
+
+    mismatch = ~none & (rng.random(n_students) < mismatch_rate)
+    csv.loc[mismatch, 'Code'] += rng.integers(1, 1000, mismatch.sum())
+    duplicate = ~none & (rng.random(n_students) < duplicate_rate)
+    csv.loc[duplicate, 'A:Code'] = rng.choice(ids, duplicate.sum()).astype(str)
+
+    return pd.concat([csv, questions], axis=1).to_csv(sep=';', index=False).encode('utf-8')
+
+
+# Fichier de l'administration synthétique, avec la disposition attendue par
+# update_excel_with_notes : `preamble` lignes de titre, puis l'en-tête
+# NOTES_HEADERS et une ligne par étudiant (colonne 'Note' vide)
+# `output` : chemin ou fichier binaire ; le classeur est écrit en flux.
+def make_roster_workbook(n_students, output, preamble=3, seed=0):
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    birth = pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 3650, n_students), unit='D')
+    groups = rng.integers(1, 10, n_students)
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Feuille1')
+    for line in range(preamble):
+        sheet.append([f"Université synthétique - ligne {line + 1}"])
+    sheet.append(NOTES_HEADERS)
+    for i in range(n_students):
+        sheet.append([100000 + i, f"R{i:09d}", f"NOM{i}", f"PRENOM{i}", birth[i].to_pydatetime(),
+                      f"G{groups[i]}", i + 1, None])
+    workbook.save(output)
+
+
+# Jeu de données complet en mémoire : (classeur .xlsx, export CSV) en octets
+def make_dataset(n_students, none_rate=0.02, mismatch_rate=0.01, duplicate_rate=0.01, seed=0):
+    roster = BytesIO()
+    make_roster_workbook(n_students, roster, seed=seed)
+    scores = make_scores_csv(n_students, none_rate=none_rate, mismatch_rate=mismatch_rate,
+                             duplicate_rate=duplicate_rate, seed=seed)
+    return roster.getvalue(), scores
+
+
+# Projet AMC synthétique : répertoire data/ avec scoring.sqlite et
+# association.sqlite (tables et colonnes utilisées par read_amc_project)
+def make_amc_project(directory, n_students, n_questions=20, none_rate=0.02, seed=0):
+    import sqlite3
+    from pathlib import Path
+
+    rng = np.random.default_rng(seed)
+    data_dir = Path(directory) / 'data'
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    students = np.arange(1, n_students + 1)
+    codes = np.arange(100000, 100000 + n_students)
+    marks = np.round(rng.uniform(0, 20, n_students) * 4) / 4
+    identified = rng.random(n_students) >= none_rate
+
+    with sqlite3.connect(data_dir / 'scoring.sqlite') as scoring:
+        scoring.execute("CREATE TABLE scoring_mark (student INTEGER, copy INTEGER, total REAL, max REAL, mark REAL)")
+        scoring.execute("CREATE TABLE scoring_code (student INTEGER, copy INTEGER, code TEXT, value TEXT, direct INTEGER)")
+        scoring.executemany("INSERT INTO scoring_mark VALUES (?, 0, ?, 20, ?)",
+                            zip(students.tolist(), marks.tolist(), marks.tolist()))
+        scoring.executemany("INSERT INTO scoring_code VALUES (?, 0, 'etu', ?, 1)",
+                            zip(students.tolist(), codes.astype(str).tolist()))
+        scoring.execute("CREATE TABLE scoring_title (question INTEGER, title TEXT)")
+        scoring.execute("CREATE TABLE scoring_score (student INTEGER, copy INTEGER, question INTEGER, score REAL, why TEXT)")
+        scoring.executemany("INSERT INTO scoring_title VALUES (?, ?)",
+                            [(q + 1, f"Q{q + 1}") for q in range(n_questions)])
+        answers = rng.integers(0, 2, (n_students, n_questions))
+        scoring.executemany("INSERT INTO scoring_score VALUES (?, 0, ?, ?, '')",
+                            [(int(student), q + 1, int(answers[i, q]))
+                             for i, student in enumerate(students) for q in range(n_questions)])
+
+    with sqlite3.connect(data_dir / 'association.sqlite') as association:
+        association.execute("CREATE TABLE association_association (student INTEGER, copy INTEGER, manual TEXT, auto TEXT)")
+        association.executemany("INSERT INTO association_association VALUES (?, 0, NULL, ?)",
+                                zip(students[identified].tolist(), codes[identified].astype(str).tolist()))
+
+    return data_dir
+
+
+# Meilleur temps sur `repeat` exécutions, et résultat de la dernière
+def timed(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def best_time(func, repeat=3):
+    return timed(func, repeat)[0]
+
+
+# Comparaison des moteurs de lecture CSV ('c' et 'pyarrow')
+def bench_csv_engines(sizes=(10_000, 100_000), n_questions=20):
+    rows = []
+    for size in sizes:
+        data = make_scores_csv(size, n_questions)
+        for engine in ['c', 'pyarrow']:
+            seconds = best_time(lambda: split_scores(read_scores(BytesIO(data), engine=engine)))
+            rows.append({'Copies': size, 'Moteur': engine, 'Temps (s)': round(seconds, 4)})
+    return pd.DataFrame(rows)
+
+
+# Pic de mémoire Python (tracemalloc, en Mo) pendant l'exécution de `func`
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+# Feuille de l'administration synthétique, telle que renvoyée par merge_notes
+def make_merged_sheet(n_students, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Code': np.arange(100000, 100000 + n_students).astype(str),
+        'CNE': [f"R{i:09d}" for i in range(n_students)],
+        'Nom': [f"NOM{i}" for i in range(n_students)],
+        'Prénom': [f"PRENOM{i}" for i in range(n_students)],
+        'DATE_NAI_IND': pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 3650, n_students), unit='D'),
+        'Groupe': rng.integers(1, 10, n_students),
+        'N° Exam': np.arange(n_students),
+        'Note': np.round(rng.uniform(0, 20, n_students) * 4) / 4,
+    })
+
+
+# Export Excel : pd.ExcelWriter (feuille construite en mémoire, puis copiée
+# dans un BytesIO) contre write_excel en écriture seule vers un fichier
+def bench_excel_export(sizes=(10_000, 50_000)):
+    def excel_writer(df):
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False, sheet_name='Feuille1', header=False)
+        return output.getvalue()
+
+    rows = []
+    for size in sizes:
+        df = make_merged_sheet(size)
+        with tempfile.TemporaryFile() as spool:
+            for name, export in [('ExcelWriter', lambda: excel_writer(df)),
+                                 ('write_excel', lambda: write_excel(df, spool))]:
+                spool.seek(0)
+                seconds = best_time(export, repeat=1)
+                spool.seek(0)
+                rows.append({'Lignes': size, 'Export': name, 'Temps (s)': round(seconds, 3),
+                             'Pic mémoire (Mo)': round(peak_memory(export), 1)})
+    return pd.DataFrame(rows)
+
+
+# Tailles par défaut de la suite de benchmarks (jusqu'à 200_000 avec --sizes)
+BENCH_SIZES = (1_000, 10_000)
+
+# Référence des temps par étape, et tolérance avant de signaler une régression
+BASELINE_FILE = Path(__file__).with_name('amcbench_baseline.json')
+BASELINE_TOLERANCE = 0.5
+BASELINE_MIN_SECONDS = 0.01
+
+
+# Temps de chaque étape de la chaîne sur un jeu de données synthétique :
+# lecture du fichier de l'administration (process_excel), lecture et
+# séparation des notes (process_csv), report des notes (merge) et export
+# Excel (to_excel)
+def bench_pipeline(sizes=BENCH_SIZES, repeat=3):
+    rows = []
+    for size in sizes:
+        roster_data, scores_data = make_dataset(size)
+
+        timings = {}
+        timings['process_excel'], roster = timed(lambda: read_roster(BytesIO(roster_data)), repeat)
+        timings['process_csv'], (_, _, notes) = timed(
+            lambda: split_scores(read_scores(BytesIO(scores_data), chunksize=SCORES_CHUNKSIZE)), repeat)
+        timings['merge'], merged = timed(lambda: merge_notes(roster, notes), repeat)
+        with tempfile.TemporaryFile() as spool:
+            timings['to_excel'], _ = timed(lambda: spool.seek(0) or write_excel(merged, spool), repeat)
+
+        rows.extend({'Étape': stage, 'Étudiants': size, 'Temps (s)': round(seconds, 4)}
+                    for stage, seconds in timings.items())
+    return pd.DataFrame(rows)
+
+
+def baseline_key(row):
+    return f"{row['Étape']}@{row['Étudiants']}"
+
+
+def load_baseline(path=BASELINE_FILE):
+    path = Path(path)
+    return json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    baseline = load_baseline(path)
+    baseline.update({baseline_key(row): row['Temps (s)'] for _, row in results.iterrows()})
+    Path(path).write_text(json.dumps(baseline, indent=2, sort_keys=True), encoding='utf-8')
+
+
+# Comparaison à la référence : une étape régresse si son temps dépasse la
+# référence de plus de `tolerance` (0.5 = 50 %) et d'au moins
+# BASELINE_MIN_SECONDS (les étapes très courtes sont trop bruitées)
+def compare_baseline(results, baseline, tolerance=BASELINE_TOLERANCE):
+    reference = results.apply(lambda row: baseline.get(baseline_key(row), np.nan), axis=1)
+    results = results.assign(**{
+        'Référence (s)': reference,
+        'Écart (%)': ((results['Temps (s)'] / reference - 1) * 100).round(1),
+    })
+    results['Régression'] = ((results['Temps (s)'] > reference * (1 + tolerance))
+                             & (results['Temps (s)'] - reference > BASELINE_MIN_SECONDS))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la chaîne de traitement AMC")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCH_SIZES),
+                        help="Nombres d'étudiants des jeux de données synthétiques")
+    parser.add_argument('--repeat', type=int, default=3, help="Nombre d'exécutions par étape (meilleur temps)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Fichier JSON des temps de référence")
+    parser.add_argument('--tolerance', type=float, default=BASELINE_TOLERANCE,
+                        help="Dépassement toléré de la référence (0.5 = 50 %%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Enregistrer les temps mesurés comme référence")
+    parser.add_argument('--engines', action='store_true', help="Comparer aussi les moteurs de lecture CSV")
+    parser.add_argument('--excel', action='store_true', help="Mesurer aussi la mémoire de l'export Excel")
+    args = parser.parse_args(argv)
+
+    if args.engines:
+        print(bench_csv_engines().to_string(index=False))
+    if args.excel:
+        print(bench_excel_export().to_string(index=False))
+
+    results = compare_baseline(bench_pipeline(args.sizes, args.repeat), load_baseline(args.baseline), args.tolerance)
+    print(results.to_string(index=False))
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Référence enregistrée dans {args.baseline}")
+        return 0
+
+    # Sans référence, aucune régression ne peut être détectée : échec explicite
+    unmatched = results[results['Référence (s)'].isna()]
+    if not unmatched.empty:
+        print(f"AVERTISSEMENT : {len(unmatched)} étape(s) sans référence dans {args.baseline} : "
+              f"{', '.join(unmatched.apply(baseline_key, axis=1))} (relancer avec --update-baseline)",
+              file=sys.stderr)
+
+    regressions = results[results['Régression']]
+    if not regressions.empty:
+        print(f"{len(regressions)} étape(s) en régression : "
+              f"{', '.join(regressions.apply(baseline_key, axis=1))}", file=sys.stderr)
+    return 1 if len(regressions) or len(unmatched) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,554 @@
+import hashlib
+import importlib.util
+import os
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# En-têtes recherchés dans le fichier Excel de l'administration
+ROSTER_HEADERS = ['Code', 'Nom', 'Prénom']
+NOTES_HEADERS = ['Code', 'CNE', 'Nom', 'Prénom', 'DATE_NAI_IND', 'Groupe', 'N° Exam', 'Note']
+
+
+# Détection vectorisée de la ligne d'en-tête
+# Les lignes sont examinées par blocs de `chunk_size` : un seul passage `isin`
+# par bloc, et l'on s'arrête dès que la ligne est trouvée.
+# Avec `strip=True`, les cellules texte sont nettoyées de leurs espaces avant
+# comparaison (comportement attendu par update_excel_with_notes).
+def find_header_row(df, columns=ROSTER_HEADERS, strip=False, chunk_size=64):
+    for start in range(0, len(df), chunk_size):
+        block = df.iloc[start:start + chunk_size]
+        if strip:
+            block = block.apply(lambda col: col.where(col.isna(), col.astype(str).str.strip()))
+
+        found = np.ones(len(block), dtype=bool)
+        for col in columns:
+            found &= block.isin([col]).to_numpy().any(axis=1)
+
+        hits = np.flatnonzero(found)
+        if len(hits):
+            return block.index[hits[0]]
+
+    return None
+
+
+# Clés de jointure des codes étudiants : entiers (Int64) lorsque tous les
+# codes renseignés sont numériques, sinon codes normalisés en texte, où les
+# codes numériques perdent leurs zéros de tête ('00123' -> '123') pour
+# rester comparables aux clés entières (voir align_keys).
+# Les codes manquants restent manquants.
+def code_keys(codes):
+    codes = pd.Series(codes)
+    present = codes.dropna().infer_objects()
+    if pd.api.types.is_integer_dtype(present.dtype):
+        return codes.astype(object).where(codes.notna()).astype('Int64')
+    if pd.api.types.is_float_dtype(present.dtype) and (present == np.floor(present)).all():
+        return codes.astype('float64').astype('Int64')
+
+    normalized = normalize_codes(present)
+    digits = normalized.str.fullmatch(r'\d+')
+    if digits.all() and normalized.str.len().le(18).all():
+        return normalized.astype('int64').reindex(codes.index).astype('Int64')
+    canonical = normalized.str.lstrip('0').replace('', '0')
+    return normalized.where(~digits, canonical).reindex(codes.index)
+
+
+# Clés comparables des deux côtés d'une jointure : entières si les deux
+# côtés le sont, sinon en texte (même écriture des codes numériques que
+# code_keys)
+def align_keys(left, right):
+    if left.dtype == 'Int64' and right.dtype == 'Int64':
+        return left, right
+
+    def as_text(keys):
+        if keys.dtype != 'Int64':
+            return keys
+        return keys.dropna().astype('int64').astype(str).reindex(keys.index)
+
+    return as_text(left), as_text(right)
+
+
+# Tableau typé des étudiants, pour réduire la mémoire et accélérer les
+# recherches : 'Code' en entiers (ou catégories pour des codes saisis en
+# texte), 'Groupe' en catégories, 'DATE_NAI_IND' en dates et les
+# colonnes de texte en chaînes Arrow (si pyarrow est installé)
+def typed_roster(data, keys):
+    data = data.infer_objects()
+    columns = list(data.columns)
+    arrow_strings = importlib.util.find_spec('pyarrow') is not None
+
+    for j, name in enumerate(columns):
+        col = data.iloc[:, j]
+        kind = pd.api.types.infer_dtype(col, skipna=True)
+        if name == 'Code':
+            # Les codes saisis en texte sont conservés tels quels ('00123'
+            # doit rester '00123' pour l'association AMC) ; les clés de
+            # jointure normalisées restent dans Roster.keys
+            if kind in ('integer', 'floating', 'mixed-integer-float') and keys.dtype == 'Int64' \
+                    and columns.count('Code') == 1:
+                col = keys.set_axis(data.index)
+            elif kind == 'string':
+                col = col.astype('category')
+            else:
+                continue
+        elif name == 'Groupe':
+            col = col.astype('category')
+        elif name == 'DATE_NAI_IND' and kind in ('datetime', 'datetime64', 'date', 'string', 'mixed'):
+            dates = pd.to_datetime(col, dayfirst=True, format='mixed', errors='coerce')
+            if dates.notna().sum() == col.notna().sum():
+                col = dates
+        elif kind == 'string' and arrow_strings:
+            col = col.astype('string[pyarrow]')
+        elif kind == 'empty':
+            continue
+        data.isetitem(j, col)
+
+    return data
+
+
+# Fichier de l'administration lu une seule fois
+# - preamble_rows : lignes situées avant l'en-tête, telles que lues
+# - header_index : index de la ligne d'en-tête
+# - header : ligne d'en-tête (colonnes positionnelles)
+# - body : lignes d'étudiants brutes (colonnes positionnelles)
+# - keys : clés de jointure des codes (voir code_keys), une par ligne
+# - data : lignes d'étudiants avec les en-têtes, typées (voir typed_roster)
+# - digest : empreinte du fichier source, quand elle est connue
+# `preamble` et `raw` (feuille complète sans en-tête) ne sont construits
+# que lorsqu'on les demande.
+class Roster:
+    def __init__(self, preamble_rows, header, body, digest=None):
+        self.preamble_rows = preamble_rows
+        self.header_index = len(preamble_rows)
+        self.header = pd.Series(list(header), index=body.columns, name=self.header_index)
+        self.body = body
+        self.digest = digest
+
+        code_columns = self.header.index[self.header.eq('Code')]
+        if len(code_columns):
+            self.keys = code_keys(body[code_columns[0]])
+        else:
+            self.keys = pd.Series(pd.NA, index=body.index, dtype='Int64')
+
+        self.data = typed_roster(body.set_axis(self.header, axis=1), self.keys)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def preamble(self):
+        preamble = pd.DataFrame(self.preamble_rows, columns=self.body.columns)
+        return preamble.where(preamble.notna())
+
+    @property
+    def raw(self):
+        header = pd.DataFrame([tuple(self.header)], columns=self.body.columns)
+        return pd.concat([self.preamble, header, self.body], ignore_index=True)
+
+
+# Cellule d'en-tête débarrassée de ses espaces ('Code ' -> 'Code')
+def strip_cell(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+# Construction du Roster à partir d'une suite de lignes (tuples de valeurs)
+# La recherche de l'en-tête s'arrête dès qu'il est trouvé : seules les lignes
+# qui le précèdent sont conservées telles quelles, le reste est lu d'un bloc.
+def roster_from_rows(rows, columns=ROSTER_HEADERS, digest=None):
+    rows = iter(rows)
+    preamble_rows = []
+    for row in rows:
+        cells = tuple(strip_cell(value) for value in row)
+        if all(col in cells for col in columns):
+            header = cells
+            break
+        preamble_rows.append(tuple(row))
+    else:
+        raise ValueError(f"Les colonnes {', '.join(repr(col) for col in columns)} sont introuvables dans le fichier.")
+
+    # Lignes de longueurs inégales (classeurs sans dimensions enregistrées) :
+    # complétées par des cellules vides
+    body = pd.DataFrame(list(rows))
+    width = max(len(header), body.shape[1], *map(len, preamble_rows))
+    header = tuple(header) + (None,) * (width - len(header))
+    preamble_rows = [row + (None,) * (width - len(row)) for row in preamble_rows]
+    body = body.reindex(columns=range(width))
+    return Roster(preamble_rows, header, body.where(body.notna()), digest)
+
+
+# Lecteurs du fichier Excel de l'administration
+# Chacun renvoie les lignes de la première feuille sous forme de tuples.
+
+# openpyxl en lecture seule : lignes lues en flux, sans charger la feuille
+def openpyxl_rows(file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+# python-calamine (optionnel) : lecteur natif, nettement plus rapide
+def calamine_rows(file):
+    from python_calamine import CalamineWorkbook
+
+    if isinstance(file, (str, os.PathLike)):
+        workbook = CalamineWorkbook.from_path(os.fspath(file))
+    else:
+        workbook = CalamineWorkbook.from_filelike(file)
+
+    # Les lignes commencent à la première colonne utilisée : elles sont
+    # complétées à gauche pour garder les colonnes de la feuille (comme
+    # openpyxl). Cellules vides renvoyées comme '' et entiers comme flottants.
+    sheet = workbook.get_sheet_by_index(0)
+    padding = (None,) * (sheet.start[1] if sheet.start else 0)
+    for row in sheet.iter_rows():
+        yield padding + tuple(
+            None if value == '' else int(value) if isinstance(value, float) and value.is_integer() else value
+            for value in row
+        )
+
+
+ROSTER_READERS = {
+    'openpyxl': openpyxl_rows,
+    'calamine': calamine_rows,
+}
+
+
+# Lecteur utilisé par défaut : calamine s'il est installé, sinon openpyxl
+def default_roster_engine():
+    return 'calamine' if importlib.util.find_spec('python_calamine') is not None else 'openpyxl'
+
+
+# Lecture du fichier Excel de l'administration et détection de l'en-tête
+# `engine` : 'openpyxl', 'calamine', 'pandas' (lecture complète avec
+# pd.read_excel) ou None pour le lecteur par défaut.
+def read_roster(file, columns=ROSTER_HEADERS, digest=None, engine=None):
+    engine = engine or default_roster_engine()
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    if engine == 'pandas':
+        raw = pd.read_excel(file, header=None)
+
+        header_index = find_header_row(raw, columns, strip=True)
+        if header_index is None:
+            raise ValueError(f"Les colonnes {', '.join(repr(col) for col in columns)} sont introuvables dans le fichier.")
+
+        preamble_rows = list(raw.iloc[:header_index].itertuples(index=False, name=None))
+        body = raw.iloc[header_index + 1:].reset_index(drop=True)
+        return Roster(preamble_rows, raw.iloc[header_index].map(strip_cell), body, digest)
+
+    if engine not in ROSTER_READERS:
+        raise ValueError(f"Lecteur Excel inconnu : {engine}")
+
+    return roster_from_rows(ROSTER_READERS[engine](file), columns, digest)
+
+
+# Empreinte SHA-256 du contenu d'un fichier (clé de cache)
+def content_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# Colonnes du fichier CSV d'AMC utilisées par le traitement des notes
+SCORES_COLUMNS = ['A:Code', 'Code', 'Nom', 'Note']
+SCORES_DTYPES = {'A:Code': str, 'Code': str, 'Nom': str, 'Note': 'float64'}
+
+# Taille des blocs pour la lecture en flux des gros exports AMC
+SCORES_CHUNKSIZE = 50_000
+
+
+# Types Arrow équivalents pour le moteur 'pyarrow'
+def arrow_scores_dtypes():
+    import pyarrow as pa
+
+    return {
+        'A:Code': pd.ArrowDtype(pa.string()),
+        'Code': pd.ArrowDtype(pa.string()),
+        'Nom': pd.ArrowDtype(pa.string()),
+        'Note': pd.ArrowDtype(pa.float64()),
+    }
+
+
+# Noms de colonnes de la première ligne du CSV, sans déplacer la lecture
+# (les en-têtes entre guillemets, "A:Code";"Note", sont reconnus)
+def csv_header(file):
+    import csv
+
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, encoding='utf-8') as f:
+            line = f.readline()
+    else:
+        position = file.tell()
+        line = file.readline()
+        file.seek(position)
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+
+    return next(csv.reader([line.lstrip('\ufeff').rstrip('\r\n')], delimiter=';'), [])
+
+
+# Lecture du fichier CSV des notes calculées par AMC
+# Seules les colonnes `columns` sont lues (toutes si `columns=None`), ce qui
+# évite de charger les colonnes de score par question des exports larges.
+# Avec `chunksize`, renvoie un itérateur de blocs au lieu d'un DataFrame.
+# `engine='pyarrow'` lit le fichier en parallèle et renvoie des colonnes
+# Arrow ; il ne lit pas par blocs et se replie sur le moteur C si pyarrow
+# n'est pas installé ou si `chunksize` est demandé.
+def read_scores(file, columns=SCORES_COLUMNS, chunksize=None, engine='c'):
+    if engine == 'pyarrow' and chunksize is None and importlib.util.find_spec('pyarrow') is not None:
+        usecols = None if columns is None else [col for col in csv_header(file) if col in columns]
+        return pd.read_csv(file, delimiter=';', encoding='utf-8', usecols=usecols,
+                           dtype=arrow_scores_dtypes(), engine='pyarrow', dtype_backend='pyarrow')
+
+    usecols = None if columns is None else (lambda col: col in columns)
+    return pd.read_csv(file, delimiter=';', encoding='utf-8', usecols=usecols,
+                       dtype=SCORES_DTYPES, chunksize=chunksize)
+
+
+# Normalisation des codes AMC (espaces, casse)
+def normalize_codes(codes):
+    return codes.astype(str).str.strip().str.upper()
+
+
+# Série des notes indexée par code normalisé, sans traitement des doublons
+def notes_series(csv_clean):
+    codes = pd.Index(normalize_codes(csv_clean['A:Code']), name='Code')
+    return pd.Series(csv_clean['Note'].to_numpy(dtype='float64', na_value=np.nan), index=codes, name='Note')
+
+
+# Gestion des codes présents sur plusieurs copies :
+# - 'last' : la dernière copie l'emporte (comportement historique)
+# - 'first' : la première copie l'emporte
+# - 'flag' : aucune note n'est retenue, les copies sont signalées comme anomalies
+# Les doublons sont cherchés sur les clés de jointure (voir code_keys) : '00123'
+# et '123' désignent le même étudiant.
+def drop_duplicate_codes(notes, duplicates='last'):
+    if duplicates not in ('first', 'last', 'flag'):
+        raise ValueError(f"Valeur inconnue pour 'duplicates' : {duplicates}")
+
+    keep = False if duplicates == 'flag' else duplicates
+    return notes[~note_keys(notes).duplicated(keep=keep).to_numpy()]
+
+
+# Clés de jointure d'une série de notes, une par note (index positionnel)
+def note_keys(notes):
+    return code_keys(notes.index.to_series(index=range(len(notes))))
+
+
+# Série des notes indexée par code normalisé, un seul code par étudiant
+def build_notes(csv_clean, duplicates='last'):
+    return drop_duplicate_codes(notes_series(csv_clean), duplicates)
+
+
+# Séparation des copies mal identifiées ('A:Code' == 'NONE', et codes en
+# double avec duplicates='flag') et construction de la série des notes
+# `csv` est un DataFrame ou un itérateur de blocs (read_scores avec
+# `chunksize`) : les anomalies et les notes sont alors accumulées bloc par
+# bloc, sans jamais charger le fichier complet.
+def split_scores(csv, duplicates='last'):
+    chunks = [csv] if isinstance(csv, pd.DataFrame) else csv
+
+    clean_parts, anomaly_parts, note_parts = [], [], []
+    for chunk in chunks:
+        none_mask = chunk['A:Code'].eq('NONE').fillna(False).astype(bool)
+        anomaly_parts.append(chunk[none_mask])
+        clean_parts.append(chunk[~none_mask])
+        note_parts.append(notes_series(chunk[~none_mask]))
+
+    csv_clean = pd.concat(clean_parts)
+    anomalies = pd.concat(anomaly_parts)
+    notes = pd.concat(note_parts)
+
+    # Les doublons ne peuvent être tranchés qu'une fois tous les blocs lus
+    if duplicates == 'flag':
+        duplicated = note_keys(notes).duplicated(keep=False).to_numpy()
+        anomalies = pd.concat([anomalies, csv_clean[duplicated]]).sort_index()
+        csv_clean = csv_clean[~duplicated]
+
+    if csv_clean.empty:
+        raise ValueError("Aucune donnée valide après le nettoyage !")
+
+    return csv_clean, anomalies, drop_duplicate_codes(notes, duplicates)
+
+
+# Catégories d'anomalies des copies AMC
+ANOMALY_LABELS = {
+    'none': "Copie non identifiée (NONE)",
+    'non_numeric': "Code non numérique",
+    'absent': "Code absent de la liste des étudiants",
+    'duplicate': "Code présent sur plusieurs copies",
+    'mismatch': "'A:Code' différent de 'Code'",
+}
+
+
+# Classement de toutes les copies AMC en une passe vectorisée
+# Renvoie les copies présentant au moins une anomalie, avec une colonne
+# booléenne par catégorie et une colonne 'Anomalie' lisible. Sans `roster`,
+# la présence dans la liste des étudiants n'est pas vérifiée.
+def detect_anomalies(csv, roster=None):
+    codes = normalize_codes(csv['A:Code'])
+    none = csv['A:Code'].eq('NONE').fillna(False).astype(bool).to_numpy()
+    numeric = pd.to_numeric(codes.where(~none), errors='coerce')
+    keys = code_keys(codes.where(~none))
+
+    flags = pd.DataFrame(index=csv.index)
+    flags['none'] = none
+    flags['non_numeric'] = ~none & numeric.isna().to_numpy()
+    if roster is not None:
+        aligned, roster_keys = align_keys(keys, roster.keys.dropna())
+        flags['absent'] = ~none & ~aligned.isin(roster_keys).to_numpy()
+    else:
+        flags['absent'] = False
+    flags['duplicate'] = ~none & keys.duplicated(keep=False).to_numpy()
+    if 'Code' in csv.columns:
+        code = pd.to_numeric(normalize_codes(csv['Code']), errors='coerce')
+        flags['mismatch'] = (numeric.notna() & code.notna() & (numeric != code)).to_numpy()
+    else:
+        flags['mismatch'] = False
+
+    anomalous = flags.any(axis=1)
+    labels = flags[anomalous].dot(pd.Index([f"{ANOMALY_LABELS[col]} ; " for col in flags.columns]))
+
+    report = csv[anomalous].join(flags[anomalous])
+    report['Anomalie'] = labels.str.rstrip(' ;')
+    return report
+
+
+# Nombre de copies par catégorie d'anomalie
+def anomaly_counts(report):
+    counts = report[list(ANOMALY_LABELS)].sum()
+    return counts.rename(index=ANOMALY_LABELS).rename('Copies')
+
+
+# Notes correspondant aux clés `keys` (NaN pour les codes sans note)
+# `notes` : série indexée par code normalisé (split_scores) ; si deux codes
+# y désignent la même clé, la dernière note l'emporte
+def lookup_notes(keys, notes):
+    keys, notes_keys = align_keys(keys, note_keys(notes))
+    unique = ~notes_keys.duplicated(keep='last').to_numpy()
+    positions = pd.Index(notes_keys[unique]).get_indexer(keys)
+    values = notes.to_numpy(dtype='float64', na_value=np.nan)[unique]
+    return np.where(positions >= 0, values[positions], np.nan)
+
+
+# Report des notes dans la feuille de l'administration
+# Toutes les lignes sont conservées (y compris celles avant l'en-tête) ;
+# seule la colonne 'Note' des lignes d'étudiants est renseignée. La
+# jointure se fait sur les clés précalculées du Roster.
+def merge_notes(roster, notes):
+    header_row = roster.header_index
+    header = roster.header.dropna().astype(str).str.strip()
+
+    if not set(NOTES_HEADERS).issubset(header):
+        raise ValueError("Les en-têtes attendus n'ont pas été trouvés dans le fichier Excel.")
+
+    # Copie pour ne pas modifier la feuille partagée
+    updated_df = roster.raw.copy()
+
+    # Définir les en-têtes correctement (nettoyage des espaces)
+    updated_df.columns = [col.strip() if isinstance(col, str) else f"Unnamed_{j}" for j, col in enumerate(roster.header)]
+
+    note_col = list(updated_df.columns).index('Note')
+    updated_df.iloc[header_row + 1:, note_col] = lookup_notes(roster.keys, notes)
+
+    return updated_df
+
+
+# Report des notes directement dans le classeur d'origine
+# Seules les cellules 'Note' des codes ayant une note sont écrites : mise en
+# forme, cellules fusionnées et autres feuilles sont conservées. Les notes
+# déjà présentes pour les codes sans copie ne sont pas effacées.
+# Renvoie le nombre de notes écrites ; le classeur est enregistré dans
+# `output` (chemin ou fichier).
+def patch_workbook(file, notes, output):
+    from openpyxl import load_workbook
+
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    workbook = load_workbook(file)
+    sheet = workbook.worksheets[0]
+
+    for header_row, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+        header = [value.strip() if isinstance(value, str) else value for value in row]
+        if all(col in header for col in ROSTER_HEADERS):
+            break
+    else:
+        raise ValueError(f"Les colonnes {', '.join(repr(col) for col in ROSTER_HEADERS)} sont introuvables dans le fichier.")
+
+    if 'Note' not in header:
+        raise ValueError("La colonne 'Note' est introuvable dans le fichier Excel.")
+    code_col = header.index('Code') + 1
+    note_col = header.index('Note') + 1
+
+    # Correspondance vectorisée sur la seule colonne 'Code' (clés entières)
+    codes = pd.Series([row[0] for row in sheet.iter_rows(min_row=header_row + 1, min_col=code_col,
+                                                          max_col=code_col, values_only=True)], dtype=object)
+    matched = pd.Series(lookup_notes(code_keys(codes), notes), index=codes.index).dropna()
+
+    for offset, note in matched.items():
+        sheet.cell(row=header_row + 1 + offset, column=note_col, value=float(note))
+
+    workbook.save(output)
+    return len(matched)
+
+
+# Export de la feuille mise à jour au format Excel (sans en-tête : la ligne
+# d'en-tête d'origine fait partie des données)
+# Classeur openpyxl en écriture seule : les lignes sont converties par blocs
+# de `chunk_size` et écrites au fur et à mesure, sans construire la feuille
+# en mémoire. `output` est un chemin ou un fichier binaire.
+def write_excel(df, output, sheet_name='Feuille1', header=False, chunk_size=10_000):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    if header:
+        sheet.append(list(df.columns))
+
+    for start in range(0, len(df), chunk_size):
+        block = df.iloc[start:start + chunk_size].astype(object)
+        for row in block.where(block.notna(), None).itertuples(index=False, name=None):
+            sheet.append(row)
+
+    workbook.save(output)
+
+
+# Formats d'export des notes : extension et type MIME
+EXPORT_FORMATS = {
+    'xlsx': ('xlsx', "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    'csv': ('csv', "text/csv"),
+    'parquet': ('parquet', "application/vnd.apache.parquet"),
+}
+
+
+# Empreinte du contenu d'un DataFrame (clé de cache des exports)
+def frame_digest(df):
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return content_digest(hashes.tobytes() + repr(list(df.columns)).encode('utf-8'))
+
+
+# Sérialisation d'un DataFrame (avec en-tête) dans l'un des EXPORT_FORMATS
+def export_data(df, fmt):
+    if fmt == 'xlsx':
+        output = BytesIO()
+        write_excel(df, output, header=True)
+        return output.getvalue()
+
+    if fmt == 'csv':
+        return df.to_csv(index=False, sep=';').encode('utf-8')
+
+    if fmt == 'parquet':
+        # Parquet impose un type par colonne : les colonnes mélangeant
+        # nombres et texte (CNE, N° Exam...) sont exportées en texte
+        mixed = [col for col in df.columns if df[col].dtype == object and df[col].dropna().map(type).nunique() > 1]
+        df = df.assign(**{col: df[col].where(df[col].isna(), df[col].astype(str)) for col in mixed})
+        output = BytesIO()
+        df.to_parquet(output, index=False)
+        return output.getvalue()
+
+    raise ValueError(f"Format d'export inconnu : {fmt}")
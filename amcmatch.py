@@ -0,0 +1,87 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from amccore import normalize_codes
+
+
+# Normalisation d'un nom : accents supprimés, majuscules, ponctuation retirée
+def normalize_name(name):
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^A-Z0-9]+', ' ', name.upper()).split())
+
+
+# Trigrammes d'un nom normalisé, calculés mot par mot (l'ordre nom/prénom
+# n'a donc pas d'importance)
+def trigrams(name):
+    grams = set()
+    for word in name.split():
+        word = f"  {word} "
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+# Index inversé des trigrammes des noms de la liste des étudiants
+# Pour un nom recherché, seuls les étudiants partageant au moins un trigramme
+# sont examinés : le coût dépend des listes de trigrammes parcourues, et non
+# du produit copies × étudiants.
+class NameIndex:
+    def __init__(self, codes, names):
+        self.codes = np.asarray(codes, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+
+        postings = {}
+        sizes = np.zeros(len(self.names), dtype=int)
+        for student, name in enumerate(self.names):
+            grams = trigrams(normalize_name(name))
+            sizes[student] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(student)
+
+        self.sizes = sizes
+        self.postings = {gram: np.array(students) for gram, students in postings.items()}
+
+    # Étudiants les plus proches de `name` (coefficient de Dice sur les trigrammes)
+    def search(self, name, top=3, min_score=0.3):
+        grams = trigrams(normalize_name(name))
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return []
+
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        candidates = np.flatnonzero(shared)
+        scores = 2 * shared[candidates] / (len(grams) + self.sizes[candidates])
+
+        keep = scores >= min_score
+        candidates, scores = candidates[keep], scores[keep]
+        order = np.argsort(-scores, kind='stable')[:top]
+        return [(self.codes[i], self.names[i], float(scores[j])) for j, i in zip(order, candidates[order])]
+
+
+# Index des étudiants de la liste dont le code n'a pas déjà été reconnu sur
+# une copie identifiée
+def roster_name_index(roster, matched_codes=()):
+    students = roster.data.dropna(subset=['Code'])
+    available = ~normalize_codes(students['Code']).isin(set(matched_codes))
+    students = students[available.to_numpy()]
+    names = students['Nom'].fillna('').astype(str) + ' ' + students['Prénom'].fillna('').astype(str)
+    return NameIndex(students['Code'].to_numpy(), names.to_numpy())
+
+
+# Codes proposés pour les copies mal identifiées, à partir du 'Nom' lu par AMC
+# Renvoie une ligne par proposition, classées par similarité décroissante.
+def suggest_codes(anomalies, roster, csv_clean=None, top=3, min_score=0.3):
+    matched = normalize_codes(csv_clean['A:Code']) if csv_clean is not None else ()
+    index = roster_name_index(roster, matched)
+
+    rows = []
+    for copy, name in anomalies['Nom'].items():
+        for rank, (code, student, score) in enumerate(index.search(name, top, min_score), start=1):
+            rows.append({'Copie': copy, 'Nom (AMC)': name, 'Rang': rank, 'Code proposé': code,
+                         'Étudiant': student, 'Similarité': round(score, 3)})
+
+    return pd.DataFrame(rows, columns=['Copie', 'Nom (AMC)', 'Rang', 'Code proposé', 'Étudiant', 'Similarité'])
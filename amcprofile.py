@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+# Journal des mesures : une ligne JSON par exécution, dans le fichier donné
+# par la variable d'environnement AMCPY_PROFILE_LOG, sinon sur la sortie
+# d'erreur
+logger = logging.getLogger('amcpy.profile')
+if not logger.handlers:
+    log_file = os.environ.get('AMCPY_PROFILE_LOG')
+    handler = logging.FileHandler(log_file, encoding='utf-8') if log_file else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# tracemalloc est global au processus, alors que Streamlit exécute chaque
+# session dans son propre fil : le suivi est démarré par la première mesure
+# en cours et arrêté par la dernière (compteur protégé par un verrou)
+tracing_lock = threading.Lock()
+tracing_users = 0
+tracing_owner = False
+
+
+def start_tracing():
+    global tracing_users, tracing_owner
+    with tracing_lock:
+        if tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            tracing_owner = True
+        tracing_users += 1
+        # Le pic n'est remis à zéro que sans autre mesure en cours
+        if tracing_users == 1:
+            tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def stop_tracing():
+    global tracing_users, tracing_owner
+    with tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracing_users -= 1
+        if tracing_users == 0 and tracing_owner:
+            tracemalloc.stop()
+            tracing_owner = False
+        return peak
+
+
+# Mesures par étape d'une exécution (réexécution Streamlit ou session CLI) :
+# durée, pic de mémoire Python (tracemalloc, si `memory=True`) et nombre de
+# lignes traitées. Les étapes ne doivent pas être imbriquées : le pic de
+# mémoire est remis à zéro au début de chacune.
+# Le pic est approché quand plusieurs sessions mesurent en même temps : il
+# inclut alors les allocations des autres sessions (et n'est pas remis à
+# zéro). Le suivi ralentit aussi toutes les sessions tant qu'il est actif :
+# préférer la CLI (--profile) pour des mesures de mémoire fiables.
+class Profiler:
+    def __init__(self, memory=False, context=None):
+        self.memory = memory
+        self.context = dict(context or {})
+        self.run = uuid.uuid4().hex[:12]
+        self.stages = []
+
+    # Mesure d'une étape ; `record['rows']` peut être renseigné dans le bloc
+    @contextmanager
+    def stage(self, name, rows=None):
+        record = {'stage': name, 'rows': rows, 'seconds': None, 'peak_mb': None, 'error': None}
+        if self.memory:
+            baseline = start_tracing()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            if self.memory:
+                record['peak_mb'] = round(max(stop_tracing() - baseline, 0) / 2**20, 2)
+            self.stages.append(record)
+
+    def to_frame(self):
+        columns = ['stage', 'rows', 'seconds', 'peak_mb', 'error']
+        frame = pd.DataFrame(self.stages, columns=columns)
+        return frame.rename(columns={'stage': 'Étape', 'rows': 'Lignes', 'seconds': 'Durée (s)',
+                                     'peak_mb': 'Pic mémoire (Mo)', 'error': 'Erreur'})
+
+    # Une ligne JSON par exécution, pour suivre les régressions en production
+    def to_json(self):
+        return json.dumps({
+            'run': self.run,
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            **self.context,
+            'total_seconds': round(sum(record['seconds'] for record in self.stages), 4),
+            'stages': self.stages,
+        }, ensure_ascii=False)
+
+    def log(self):
+        if self.stages:
+            logger.info(self.to_json())
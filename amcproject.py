@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from amccore import read_scores
+
+# Bases SQLite d'un projet AMC utilisées pour les notes (répertoire data/)
+PROJECT_DATABASES = ['scoring', 'association']
+
+
+# Répertoire contenant scoring.sqlite et association.sqlite : le répertoire
+# lui-même, son sous-répertoire data/, ou un répertoire de l'archive zip
+def find_data_dir(root):
+    root = Path(root)
+    for candidate in [root, root / 'data', *sorted(root.glob('**/data'))]:
+        if all((candidate / f"{name}.sqlite").exists() for name in PROJECT_DATABASES):
+            return candidate
+    raise ValueError("Fichiers scoring.sqlite et association.sqlite introuvables dans le projet AMC.")
+
+
+# Répertoire data/ d'un projet AMC, donné comme répertoire, chemin d'une
+# archive zip ou fichier zip ouvert ; seules les bases utiles sont extraites
+@contextmanager
+def project_data_dir(project):
+    if isinstance(project, (str, os.PathLike)) and Path(project).is_dir():
+        yield find_data_dir(project)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp, zipfile.ZipFile(project) as archive:
+        wanted = {f"{name}.sqlite" for name in PROJECT_DATABASES}
+        members = [member for member in archive.namelist() if Path(member).name in wanted]
+        archive.extractall(tmp, members)
+        yield find_data_dir(tmp)
+
+
+# Champ de code de la feuille de réponses (boîtes de l'identifiant étudiant)
+def code_field(connection, field=None):
+    fields = [row[0] for row in connection.execute("SELECT DISTINCT code FROM scoring.scoring_code ORDER BY code")]
+    if field is not None:
+        if field not in fields:
+            raise ValueError(f"Champ de code inconnu : {field} (disponibles : {', '.join(fields)})")
+        return field
+    if len(fields) > 1:
+        raise ValueError(f"Plusieurs champs de code dans le projet ({', '.join(fields)}) : préciser lequel utiliser.")
+    return fields[0] if fields else None
+
+
+# Notes d'un projet AMC, lues directement dans scoring.sqlite et
+# association.sqlite, avec les colonnes de l'export CSV ('A:Code', 'Code',
+# 'Nom', 'Note') pour passer par split_scores
+# - A:Code : association manuelle, sinon automatique, sinon 'NONE'
+# - Code : valeur lue dans le champ de code `field`
+# - Nom : absent des bases (il vient de la liste des étudiants), laissé vide
+def read_amc_project(project, field=None):
+    with project_data_dir(project) as data_dir:
+        connection = sqlite3.connect(':memory:', uri=True)
+        try:
+            for name in PROJECT_DATABASES:
+                uri = (data_dir / f"{name}.sqlite").resolve().as_uri() + '?mode=ro'
+                connection.execute(f"ATTACH DATABASE ? AS {name}", (uri,))
+            field = code_field(connection, field)
+
+            csv = pd.read_sql_query(
+                """
+                SELECT CAST(COALESCE(a.manual, a.auto) AS TEXT) AS "A:Code",
+                       CAST(c.value AS TEXT) AS "Code",
+                       NULL AS "Nom",
+                       m.mark AS "Note"
+                FROM scoring.scoring_mark AS m
+                LEFT JOIN association.association_association AS a
+                       ON a.student = m.student AND a.copy = m.copy
+                LEFT JOIN scoring.scoring_code AS c
+                       ON c.student = m.student AND c.copy = m.copy AND c.code = ?
+                ORDER BY m.student, m.copy
+                """,
+                connection, params=(field,),
+            )
+        finally:
+            connection.close()
+
+    csv['A:Code'] = csv['A:Code'].fillna('NONE')
+    csv['Nom'] = csv['Nom'].astype(object)
+    csv['Note'] = csv['Note'].astype('float64')
+    return csv
+
+
+# Le fichier de notes est-il un projet AMC (répertoire ou archive zip) ?
+def is_amc_project(file):
+    if isinstance(file, (str, os.PathLike)):
+        return Path(file).is_dir() or zipfile.is_zipfile(file)
+
+    position = file.tell()
+    try:
+        return zipfile.is_zipfile(file)
+    finally:
+        file.seek(position)
+
+
+# Lecture des notes depuis un export CSV ou un projet AMC
+# Mêmes paramètres que read_scores ; un projet est toujours lu d'un bloc.
+def open_scores(file, chunksize=None, engine='c'):
+    if is_amc_project(file):
+        return read_amc_project(file)
+    return read_scores(file, chunksize=chunksize, engine=engine)
+
+
+# Scores par question d'un projet AMC (table scoring_score), une colonne par
+# question (titre de scoring_title), une ligne par copie
+def read_project_questions(project):
+    with project_data_dir(project) as data_dir:
+        connection = sqlite3.connect(':memory:', uri=True)
+        try:
+            uri = (data_dir / 'scoring.sqlite').resolve().as_uri() + '?mode=ro'
+            connection.execute("ATTACH DATABASE ? AS scoring", (uri,))
+            scores = pd.read_sql_query(
+                """
+                SELECT s.student, s.copy, t.title AS question, s.score
+                FROM scoring.scoring_score AS s
+                JOIN scoring.scoring_title AS t ON t.question = s.question
+                """,
+                connection,
+            )
+        finally:
+            connection.close()
+
+    return scores.pivot_table(index=['student', 'copy'], columns='question', values='score', sort=False)
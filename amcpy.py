@@ -0,0 +1,259 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from amccore import (read_roster, split_scores, merge_notes, patch_workbook, write_excel,
+                     detect_anomalies, SCORES_CHUNKSIZE)
+from amcprofile import Profiler
+from amcproject import open_scores
+from amcstats import what_if_table
+from amcstore import read_roster_stored, archive_notes
+
+
+# Intégration des notes d'une session : un fichier de l'administration et
+# le CSV d'AMC correspondant
+# Avec `patch`, les notes sont écrites dans une copie du classeur d'origine
+# (mise en forme conservée) au lieu d'une feuille reconstruite.
+# `simulation` et `anomaly_report` écrivent, à côté du fichier de sortie, la
+# simulation des bonus et le rapport des copies en anomalie.
+# `csv_engine` : moteur de lecture du CSV d'AMC ('c' par blocs, ou 'pyarrow'
+# qui lit le fichier d'un coup).
+# `store` : répertoire du dépôt local des listes d'étudiants déjà analysées
+# (None pour lire le classeur à chaque fois).
+# `archive` : dépôt où archiver les notes, sous l'identifiant `exam` (par
+# défaut le nom du fichier CSV).
+# `profiler` : Profiler recevant les mesures de chaque étape.
+def merge_session(roster_file, scores_file, output_file, duplicates='last', engine=None, csv_engine='c',
+                  patch=False, simulation=False, anomaly_report=False, store=None, archive=None, exam=None,
+                  profiler=None):
+    output_file = Path(output_file)
+    profiler = profiler or Profiler()
+    with profiler.stage('process_csv') as stage:
+        chunksize = None if csv_engine == 'pyarrow' else SCORES_CHUNKSIZE
+        csv_clean, anomalies, notes = split_scores(open_scores(scores_file, chunksize=chunksize, engine=csv_engine),
+                                                   duplicates)
+        stage['rows'] = len(csv_clean)
+
+    def load_roster():
+        with profiler.stage('read_roster') as stage:
+            if store is None:
+                roster = read_roster(roster_file, engine=engine)
+            else:
+                roster = read_roster_stored(roster_file, engine=engine, store=store)
+            stage['rows'] = len(roster)
+        return roster
+
+    roster = None
+    if patch:
+        with profiler.stage('patch_workbook') as stage:
+            stage['rows'] = patch_workbook(roster_file, notes, output_file)
+    else:
+        roster = load_roster()
+        with profiler.stage('merge_notes', rows=len(notes)):
+            merged = merge_notes(roster, notes)
+        with profiler.stage('to_excel', rows=len(merged)):
+            write_excel(merged, output_file)
+
+    # Simulation des bonus et des seuils, à côté du fichier des notes
+    if simulation:
+        what_if_table(csv_clean['Note']).to_csv(output_file.with_name(f"{output_file.stem}_simulation.csv"),
+                                                sep=';', index=False)
+
+    # Rapport des anomalies (NONE, codes invalides, absents, en double...)
+    if anomaly_report:
+        if roster is None:
+            roster = load_roster()
+        report = detect_anomalies(pd.concat([csv_clean, anomalies]).sort_index(), roster)
+        report.to_csv(output_file.with_name(f"{output_file.stem}_anomalies.csv"), sep=';', index=False)
+
+    if archive is not None:
+        archive_notes(notes, exam or Path(scores_file).stem, archive)
+
+    return len(csv_clean), len(anomalies)
+
+
+# Sessions d'un répertoire : chaque sous-répertoire contenant exactement un
+# fichier .xlsx et un fichier .csv est une session
+def find_sessions(directory):
+    sessions = []
+    for session in sorted(Path(directory).iterdir()):
+        if not session.is_dir():
+            continue
+        rosters = list(session.glob('*.xlsx'))
+        scores = list(session.glob('*.csv'))
+        if len(rosters) == 1 and len(scores) == 1:
+            sessions.append((session.name, rosters[0], scores[0]))
+    return sessions
+
+
+# Manifeste de sessions : CSV (séparateur ';') avec les colonnes 'roster',
+# 'scores' et 'output' ; les chemins relatifs le sont au manifeste
+# Renvoie les sessions valides et les résumés d'échec des lignes incomplètes
+# (cellule vide), qui n'empêchent pas de traiter les autres sessions.
+def read_manifest(manifest):
+    base = Path(manifest).parent
+    jobs = pd.read_csv(manifest, delimiter=';', encoding='utf-8', dtype=str)
+
+    columns = ['roster', 'scores', 'output']
+    missing = [col for col in columns if col not in jobs.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le manifeste : {', '.join(missing)}")
+
+    jobs = jobs[columns].apply(lambda col: col.str.strip())
+    jobs = jobs.where(jobs.ne(''))
+    valid, invalid = [], []
+    for line, job in zip(jobs.index + 2, jobs.itertuples(index=False)):
+        empty = [col for col, path in zip(columns, job) if pd.isna(path)]
+        if empty:
+            error = f"ligne {line} du manifeste : colonne(s) vide(s) {', '.join(empty)}"
+            invalid.append({'roster': job.roster, 'scores': job.scores, 'output': job.output,
+                            'present': None, 'anomalies': None, 'error': error, 'seconds': 0.0})
+        else:
+            valid.append(tuple(base / path for path in job))
+    return valid, invalid
+
+
+# Exécution d'une session dans un processus de travail : le fichier de
+# sortie est écrit par le processus lui-même, seul un résumé est renvoyé
+# `options` : paramètres de merge_session (duplicates, engine, patch...)
+# Avec `profile`, les mesures par étape sont journalisées en JSON.
+# `job` : (roster, scores, output, exam), `exam` étant l'identifiant archivé
+def merge_job(job, profile=False, **options):
+    roster, scores, output, exam = job
+    start = time.perf_counter()
+    report = {'roster': str(roster), 'scores': str(scores), 'output': str(output)}
+    profiler = Profiler(memory=profile, context={'roster': str(roster), 'scores': str(scores)})
+    try:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        present, anomalies = merge_session(roster, scores, output, exam=exam, profiler=profiler, **options)
+        report.update(present=present, anomalies=anomalies, error=None)
+    except Exception as e:
+        report.update(present=None, anomalies=None, error=str(e))
+    if profile:
+        profiler.log()
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+
+# Répartition des sessions sur `workers` processus ; les résumés sont
+# produits au fur et à mesure que les sessions se terminent
+def run_jobs(jobs, workers=1, **options):
+    if workers <= 1:
+        for job in jobs:
+            yield merge_job(job, **options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(merge_job, job, **options) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def cmd_merge(args):
+    invalid = []
+    # Identifiant d'archive de chaque session : --exam pour une session
+    # seule, sinon le nom de la session (ou du fichier de sortie du manifeste)
+    if args.manifest:
+        jobs, invalid = read_manifest(args.manifest)
+        exams = [Path(output).stem for _, _, output in jobs]
+    elif args.sessions:
+        output_dir = Path(args.output or args.sessions)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        sessions = find_sessions(args.sessions)
+        jobs = [(roster, scores, output_dir / f"{name}_avec_notes.xlsx") for name, roster, scores in sessions]
+        exams = [name for name, _, _ in sessions]
+    elif args.roster and args.scores:
+        jobs = [(Path(args.roster), Path(args.scores), Path(args.output or 'etudiants_avec_notes.xlsx'))]
+        exams = [None]
+    else:
+        print("Indiquer --roster et --scores, --sessions ou --manifest", file=sys.stderr)
+        return 2
+
+    if len(jobs) == 1 and args.exam:
+        exams = [args.exam]
+    elif args.exam:
+        print("--exam ne s'applique qu'à une seule session : avec plusieurs sessions, chacune est "
+              "archivée sous son propre nom", file=sys.stderr)
+        return 2
+    if args.archive and len(set(exams)) < len(exams):
+        print("Plusieurs sessions ont le même nom : elles seraient archivées sous le même examen", file=sys.stderr)
+        return 2
+    jobs = [(*job, exam) for job, exam in zip(jobs, exams)]
+
+    for report in invalid:
+        print(f"ERREUR {report['error']}", file=sys.stderr)
+
+    if not jobs:
+        print("Aucune session à traiter", file=sys.stderr)
+        return 1
+
+    reports = list(invalid)
+    for report in run_jobs(jobs, args.workers, duplicates=args.duplicates, engine=args.engine,
+                           csv_engine=args.csv_engine, patch=args.patch, simulation=args.simulation,
+                           anomaly_report=args.anomalies, store=args.store, archive=args.archive,
+                           profile=args.profile):
+        reports.append(report)
+        if report['error']:
+            print(f"ERREUR {report['roster']} ({report['seconds']} s) : {report['error']}", file=sys.stderr)
+        else:
+            print(f"{report['output']} : {report['present']} copies intégrées, "
+                  f"{report['anomalies']} mal identifiées ({report['seconds']} s)")
+
+    if args.report:
+        pd.DataFrame(reports).to_csv(args.report, sep=';', index=False)
+
+    failures = sum(report['error'] is not None for report in reports)
+    if len(reports) > 1:
+        print(f"{len(reports) - failures}/{len(reports)} sessions traitées, {failures} échec(s)")
+
+    return 1 if failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='amcpy', description="Traitements de fichiers Excel et CSV pour AMC")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    merge = commands.add_parser('merge', help="Intégrer les notes AMC au fichier de l'administration")
+    merge.add_argument('--roster', help="Fichier Excel de l'administration")
+    merge.add_argument('--scores', help="Fichier CSV des notes calculées par AMC, ou projet AMC (répertoire ou .zip)")
+    merge.add_argument('--sessions', help="Répertoire de sessions (un sous-répertoire .xlsx + .csv par session)")
+    merge.add_argument('--manifest', help="Fichier CSV listant les sessions (colonnes roster;scores;output)")
+    merge.add_argument('-o', '--output', help="Fichier de sortie, ou répertoire de sortie avec --sessions")
+    merge.add_argument('-j', '--workers', type=int, default=1,
+                       help=f"Nombre de processus en parallèle (par exemple {os.cpu_count()})")
+    merge.add_argument('--report', help="Fichier CSV du compte rendu par session (durée, anomalies, erreurs)")
+    merge.add_argument('--duplicates', choices=['first', 'last', 'flag'], default='last',
+                       help="Traitement des codes présents sur plusieurs copies")
+    merge.add_argument('--engine', choices=['openpyxl', 'calamine', 'pandas'],
+                       help="Lecteur du fichier Excel (par défaut : calamine s'il est installé)")
+    merge.add_argument('--csv-engine', choices=['c', 'pyarrow'], default='c',
+                       help="Moteur de lecture du CSV d'AMC : 'c' par blocs, 'pyarrow' d'un coup (plus rapide)")
+    merge.add_argument('--patch', action='store_true',
+                       help="Écrire les notes dans le classeur d'origine (mise en forme et autres feuilles conservées)")
+    merge.add_argument('--simulation', action='store_true',
+                       help="Exporter aussi les taux de réussite par bonus et par seuil (<sortie>_simulation.csv)")
+    merge.add_argument('--anomalies', action='store_true',
+                       help="Exporter aussi le rapport des copies en anomalie (<sortie>_anomalies.csv)")
+    merge.add_argument('--store', help="Dépôt local des listes d'étudiants déjà analysées (par exemple ~/.amcpy)")
+    merge.add_argument('--archive', help="Dépôt où archiver les notes intégrées (par exemple ~/.amcpy)")
+    merge.add_argument('--exam', help="Identifiant de l'examen archivé, pour une session seule "
+                       "(par défaut : nom du fichier CSV, ou nom de chaque session)")
+    merge.add_argument('--profile', action='store_true',
+                       help="Journaliser en JSON la durée et le pic de mémoire de chaque étape (AMCPY_PROFILE_LOG)")
+    merge.set_defaults(func=cmd_merge)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
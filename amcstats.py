@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+# Barème des notes AMC
+MAX_NOTE = 20
+PASS_NOTE = 10
+
+# Largeur des classes de l'histogramme (sur l'échelle 0–20)
+BIN_WIDTH = 0.25
+
+
+# Histogramme des notes précalculé, pour le slider "Ajouter des points"
+# Chaque note est rangée dans la classe [k * bin_width, (k + 1) * bin_width[.
+# Tant que le bonus et le seuil sont des multiples de `bin_width`, les taux
+# de réussite calculés à partir des classes sont exacts : ajouter un bonus
+# revient à décaler les classes (plafonnées à MAX_NOTE), en O(classes).
+class GradeHistogram:
+    def __init__(self, notes, bin_width=BIN_WIDTH, max_note=MAX_NOTE):
+        notes = pd.Series(notes, dtype='float64').dropna().to_numpy()
+
+        self.bin_width = bin_width
+        self.max_note = max_note
+        self.n_bins = int(round(max_note / bin_width)) + 1
+        self.total = len(notes)
+
+        bins = np.floor(np.clip(notes, 0, max_note) / bin_width + 1e-9).astype(int)
+        self.counts = np.bincount(bins, minlength=self.n_bins)
+        self.cumulative = np.cumsum(self.counts)
+
+        # tail[k] : nombre de copies dans les classes k et suivantes
+        self.tail = np.append(self.total - self.cumulative + self.counts, 0)
+
+    # Bornes inférieures des classes
+    @property
+    def values(self):
+        return np.arange(self.n_bins) * self.bin_width
+
+    def bonus_bins(self, bonus):
+        return np.rint(np.asarray(bonus, dtype='float64') / self.bin_width).astype(int)
+
+    # Effectifs par classe après ajout de `bonus` points (plafonnés à max_note)
+    def shifted(self, bonus):
+        shift = int(self.bonus_bins(bonus))
+        if shift <= 0:
+            return self.counts.copy()
+
+        counts = np.zeros_like(self.counts)
+        counts[shift:] = self.counts[:self.n_bins - shift]
+        counts[-1] += self.counts[self.n_bins - shift:].sum()
+        return counts
+
+    # Effectifs non nuls après bonus, sous forme de tableau 'Valeur'/'Effectif'
+    def effectifs(self, bonus=0):
+        counts = self.shifted(bonus)
+        present = counts > 0
+        return pd.DataFrame({'Valeur': self.values[present], 'Effectif': counts[present]})
+
+    # Taux de réussite (%) pour un ou plusieurs bonus, en un seul calcul
+    def pass_rate(self, bonus=0, threshold=PASS_NOTE):
+        if self.total == 0:
+            return np.zeros(np.shape(bonus)) if np.ndim(bonus) else 0.0
+
+        start = np.clip(self.bonus_bins(threshold) - self.bonus_bins(bonus), 0, self.n_bins)
+        rate = self.tail[start] / self.total * 100
+        return rate if np.ndim(rate) else float(rate)
+
+    # Courbe bonus / taux de réussite
+    def pass_rate_curve(self, bonuses, threshold=PASS_NOTE):
+        bonuses = np.asarray(bonuses, dtype='float64')
+        return pd.DataFrame({'Bonus': bonuses, 'Taux de réussite (%)': self.pass_rate(bonuses, threshold)})
+
+
+# Bonus et seuils de réussite examinés par défaut par les jurys
+WHAT_IF_BONUSES = np.arange(0, 5.01, 0.25)
+WHAT_IF_THRESHOLDS = np.arange(8, 12.01, 0.5)
+
+
+# Simulation complète : taux de réussite (%) pour chaque bonus (lignes) et
+# chaque seuil (colonnes), et moyenne après bonus plafonné à max_note.
+# Un seul tri des notes, puis `searchsorted` sur la grille bonus × seuil.
+def what_if(notes, bonuses=WHAT_IF_BONUSES, thresholds=WHAT_IF_THRESHOLDS, max_note=MAX_NOTE):
+    notes = np.sort(pd.Series(notes, dtype='float64').dropna().to_numpy())
+    bonuses = np.asarray(bonuses, dtype='float64')
+    thresholds = np.asarray(thresholds, dtype='float64')
+    total = len(notes)
+
+    # Réussite : min(note + bonus, max) >= seuil  <=>  note >= seuil - bonus
+    failed = np.searchsorted(notes, thresholds[None, :] - bonuses[:, None], side='left')
+    rates = (total - failed) / max(total, 1) * 100
+
+    # Moyenne : notes sous (max - bonus) augmentées du bonus, les autres à max
+    below = np.searchsorted(notes, max_note - bonuses, side='left')
+    prefix = np.concatenate([[0.0], np.cumsum(notes)])
+    means = (prefix[below] + bonuses * below + max_note * (total - below)) / max(total, 1)
+
+    index = pd.Index(bonuses, name='Bonus')
+    rates = pd.DataFrame(rates, index=index, columns=pd.Index(thresholds, name='Seuil'))
+    return rates, pd.Series(means, index=index, name='Moyenne')
+
+
+# Tableau de simulation à plat, pour l'export (une ligne par bonus)
+def what_if_table(notes, bonuses=WHAT_IF_BONUSES, thresholds=WHAT_IF_THRESHOLDS):
+    rates, means = what_if(notes, bonuses, thresholds)
+    table = rates.round(2)
+    table.columns = [f"Réussite >= {threshold:g} (%)" for threshold in rates.columns]
+    table.insert(0, 'Moyenne', means.round(2))
+    return table.reset_index()
+
+
+# Lecture d'un export AMC (CSV ou projet) pour les statistiques : notes des
+# copies identifiées
+def read_exam_notes(file, engine='c'):
+    from amccore import split_scores
+    from amcproject import open_scores
+
+    csv_clean, anomalies, _ = split_scores(open_scores(file, engine=engine))
+    return csv_clean['Note'].astype('float64').to_numpy(), len(anomalies)
+
+
+# Chargement de plusieurs exports AMC en parallèle
+# `exams` : dictionnaire {clé de l'examen: fichier}. Renvoie un seul tableau
+# en colonnes ('Examen', 'Note') et le nombre de copies mal identifiées par
+# examen. Un examen illisible est signalé dans `errors` sans bloquer les autres.
+def load_exams(exams, workers=None, engine='c'):
+    from concurrent.futures import ThreadPoolExecutor
+
+    keys = list(exams)
+    frames, anomalies, errors = [], {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(read_exam_notes, exams[key], engine) for key in keys]
+        for key, future in zip(keys, futures):
+            try:
+                notes, anomalies[key] = future.result()
+            except Exception as e:
+                errors[key] = str(e)
+                continue
+            frames.append(pd.DataFrame({'Examen': key, 'Note': notes}))
+
+    if frames:
+        grades = pd.concat(frames, ignore_index=True)
+    else:
+        grades = pd.DataFrame({'Examen': pd.Series(dtype=object), 'Note': pd.Series(dtype='float64')})
+    grades['Examen'] = pd.Categorical(grades['Examen'], categories=[key for key in keys if key not in errors])
+    return grades, pd.Series(anomalies, name='Mal identifiés', dtype='int64'), errors
+
+
+# Statistiques par examen et pour l'ensemble des examens ('Ensemble')
+def exam_summary(grades, threshold=PASS_NOTE, quantiles=(0.25, 0.5, 0.75)):
+    grouped = grades.groupby('Examen', observed=True)['Note']
+    summary = grouped.agg(['count', 'mean', 'std', 'min', 'max'])
+    summary['reussite'] = (grades['Note'] >= threshold).groupby(grades['Examen'], observed=True).mean() * 100
+    summary = summary.join(grouped.quantile(list(quantiles)).unstack())
+
+    pooled = grades['Note']
+    summary.loc['Ensemble'] = [
+        pooled.count(), pooled.mean(), pooled.std(), pooled.min(), pooled.max(),
+        (pooled >= threshold).mean() * 100, *pooled.quantile(list(quantiles)),
+    ]
+
+    summary.columns = ['Présents', 'Moyenne', 'Écart-type', 'Min', 'Max', 'Taux de réussite (%)',
+                       *[f"Q{int(q * 100)}" for q in quantiles]]
+    summary['Présents'] = summary['Présents'].astype(int)
+    return summary.round(2)
+
+
+# Effectifs par examen et par classe de note (histogrammes côte à côte)
+def exam_histograms(grades, bin_width=BIN_WIDTH, max_note=MAX_NOTE):
+    bins = np.floor(np.clip(grades['Note'].to_numpy(), 0, max_note) / bin_width + 1e-9) * bin_width
+    counts = pd.crosstab(grades['Examen'], bins)
+    counts.columns.name = 'Valeur'
+    return counts
+
+
+# Colonnes de l'export AMC qui ne sont pas des scores de question (dont les
+# totaux 'Total' et 'Max' de la copie)
+SCORES_METADATA = ['A:Code', 'Code', 'Nom', 'Prénom', 'Note', 'Total', 'Max', 'Exam', 'Groupe']
+
+
+# Colonnes de score par question d'un export AMC large : colonnes restantes
+# numériques, hors colonnes d'association ('A:...') et de cases cochées
+def question_columns(csv):
+    candidates = [col for col in csv.columns
+                  if col not in SCORES_METADATA and not str(col).startswith(('A:', 'TICKED:', 'TEXT:'))]
+    scores = csv[candidates].apply(pd.to_numeric, errors='coerce')
+    return scores.loc[:, scores.notna().any() & (scores.notna() | csv[candidates].isna()).all()]
+
+
+# Analyse des questions en une passe matricielle sur le tableau copies × questions
+# Les cellules vides (question absente du sujet de la copie) sont exclues
+# question par question. Pour chaque question :
+# - Réponses (%) : proportion de copies où la question a un score
+# - Difficulté : score moyen rapporté au score maximal observé (1 = facile)
+# - Discrimination : corrélation point-bisériale entre le score de la
+#   question et le total des autres questions (total corrigé)
+def item_analysis(scores):
+    values = scores.to_numpy(dtype='float64')
+    answered = ~np.isnan(values)
+    filled = np.where(answered, values, 0.0)
+    count = answered.sum(axis=0)
+    n = np.maximum(count, 1)
+
+    # Total des autres questions, pour chaque copie et chaque question
+    rest = filled.sum(axis=1, keepdims=True) - filled
+
+    mean_x = filled.sum(axis=0) / n
+    mean_r = (rest * answered).sum(axis=0) / n
+    cov = (filled * rest).sum(axis=0) / n - mean_x * mean_r
+    var_x = (filled ** 2).sum(axis=0) / n - mean_x ** 2
+    var_r = (rest ** 2 * answered).sum(axis=0) / n - mean_r ** 2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        max_x = np.where(count > 0, np.max(np.where(answered, values, -np.inf), axis=0), np.nan)
+        difficulty = np.where(max_x > 0, mean_x / max_x, np.nan)
+        discrimination = cov / np.sqrt(var_x * var_r)
+
+    analysis = pd.DataFrame({
+        'Réponses (%)': count / max(len(values), 1) * 100,
+        'Score moyen': np.where(count > 0, mean_x, np.nan),
+        'Score max': max_x,
+        'Difficulté': difficulty,
+        'Discrimination': np.where((var_x > 1e-12) & (var_r > 1e-12), discrimination, np.nan),
+    }, index=pd.Index(scores.columns, name='Question'))
+    return analysis.round(3)
+
+
+# Scores par question d'un export AMC (CSV large ou projet)
+def read_question_scores(file):
+    from amccore import read_scores
+    from amcproject import is_amc_project, read_project_questions
+
+    if is_amc_project(file):
+        return read_project_questions(file)
+    return question_columns(read_scores(file, columns=None))
@@ -0,0 +1,243 @@
+import datetime
+import json
+import numbers
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from amccore import Roster, read_roster, content_digest
+
+# Répertoire local des données conservées entre les sessions
+# (modifiable avec la variable d'environnement AMCPY_STORE)
+STORE_DIR = Path(os.environ.get('AMCPY_STORE', Path.home() / '.amcpy'))
+
+
+# Encodage d'une cellule Excel en (type, texte), pour les colonnes de types
+# mélangés et les lignes avant l'en-tête, qu'Arrow ne sait pas typer
+def encode_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return 'none', ''
+    if isinstance(value, (bool, np.bool_)):
+        return 'bool', str(bool(value))
+    if isinstance(value, numbers.Integral):
+        return 'int', str(int(value))
+    if isinstance(value, numbers.Real):
+        return 'float', repr(float(value))
+    if isinstance(value, datetime.datetime):
+        return 'datetime', value.isoformat()
+    if isinstance(value, datetime.date):
+        return 'date', value.isoformat()
+    if isinstance(value, datetime.time):
+        return 'time', value.isoformat()
+    return 'str', str(value)
+
+
+def decode_value(kind, text):
+    if kind == 'none':
+        return None
+    if kind == 'bool':
+        return text == 'True'
+    if kind == 'int':
+        return int(text)
+    if kind == 'float':
+        return float(text)
+    if kind == 'datetime':
+        return datetime.datetime.fromisoformat(text)
+    if kind == 'date':
+        return datetime.date.fromisoformat(text)
+    if kind == 'time':
+        return datetime.time.fromisoformat(text)
+    return text
+
+
+# Emplacement du fichier Arrow d'une liste d'étudiants, par empreinte
+def roster_path(digest, store=None):
+    return Path(store or STORE_DIR) / 'rosters' / f"{digest}.arrow"
+
+
+# Enregistrement d'un Roster au format Arrow IPC (Feather v2, non compressé
+# pour pouvoir être projeté en mémoire au rechargement)
+# Les colonnes homogènes sont stockées typées ; les colonnes de types
+# mélangés sont stockées en deux colonnes texte (type, valeur). Les lignes
+# avant l'en-tête et l'en-tête sont conservés dans les métadonnées.
+def save_roster(roster, store=None):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    if roster.digest is None:
+        raise ValueError("Le Roster n'a pas d'empreinte : impossible de l'enregistrer.")
+
+    columns, layout = {}, []
+    for j, col in roster.body.items():
+        try:
+            columns[f"c{j}"] = pa.array(col, from_pandas=True)
+            layout.append({'name': f"c{j}", 'dtype': str(col.dtype), 'mixed': False})
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            kinds, texts = zip(*map(encode_value, col)) if len(col) else ((), ())
+            columns[f"c{j}:kind"] = pa.array(kinds, pa.string()).dictionary_encode()
+            columns[f"c{j}"] = pa.array(texts, pa.string())
+            layout.append({'name': f"c{j}", 'dtype': 'object', 'mixed': True})
+
+    metadata = {
+        'columns': layout,
+        'preamble': [[encode_value(value) for value in row] for row in roster.preamble_rows],
+        'header': [encode_value(value) for value in roster.header],
+    }
+    table = pa.table(columns).replace_schema_metadata({'amcpy.roster': json.dumps(metadata)})
+
+    path = roster_path(roster.digest, store)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Fichier temporaire propre à chaque écriture (plusieurs processus peuvent
+    # enregistrer la même liste en même temps), renommé une fois complet
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{roster.digest}.", suffix='.tmp',
+                                     delete=False) as partial:
+        pass
+    try:
+        feather.write_feather(table, partial.name, compression='uncompressed')
+        os.replace(partial.name, path)
+    except BaseException:
+        os.unlink(partial.name)
+        raise
+    return path
+
+
+# Rechargement d'un Roster enregistré (None s'il n'est pas dans le dépôt)
+def load_stored_roster(digest, store=None):
+    import pyarrow as pa
+
+    path = roster_path(digest, store)
+    if not path.exists():
+        return None
+
+    with pa.memory_map(str(path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    metadata = json.loads(table.schema.metadata[b'amcpy.roster'])
+
+    body = {}
+    for j, col in enumerate(metadata['columns']):
+        values = table.column(col['name'])
+        if col['mixed']:
+            kinds = table.column(f"{col['name']}:kind").to_pylist()
+            body[j] = pd.Series([decode_value(kind, text) for kind, text in zip(kinds, values.to_pylist())],
+                                dtype=object)
+        elif col['dtype'] == 'object':
+            body[j] = pd.Series(values.to_pylist(), dtype=object)
+        else:
+            body[j] = values.to_pandas().astype(col['dtype'])
+
+    preamble_rows = [tuple(decode_value(*value) for value in row) for row in metadata['preamble']]
+    header = [decode_value(*value) for value in metadata['header']]
+    body = pd.DataFrame(body, index=pd.RangeIndex(table.num_rows))
+    return Roster(preamble_rows, header, body.where(body.notna()), digest)
+
+
+# Lecture d'un fichier de l'administration en passant par le dépôt local :
+# le classeur n'est analysé qu'au premier passage, les suivants rechargent
+# le fichier Arrow. Un dépôt inaccessible n'empêche pas la lecture.
+def read_roster_stored(file, digest=None, engine=None, store=None):
+    if digest is None:
+        if isinstance(file, (str, os.PathLike)):
+            digest = content_digest(Path(file).read_bytes())
+        else:
+            file.seek(0)
+            digest = content_digest(file.read())
+
+    try:
+        roster = load_stored_roster(digest, store)
+    except Exception:
+        roster = None
+    if roster is not None:
+        return roster
+
+    roster = read_roster(file, digest=digest, engine=engine)
+    try:
+        save_roster(roster, store)
+    except (OSError, ImportError):
+        pass
+    return roster
+
+
+# Archive des notes intégrées : jeu de données Parquet partitionné par
+# examen (un répertoire 'Examen=<id>' par examen), où chaque intégration
+# ajoute un fichier sans jamais réécrire les précédents.
+ARCHIVE_COLUMNS = ['Examen', 'Code', 'Note', 'Horodatage']
+
+
+def archive_dir(store=None):
+    return Path(store or STORE_DIR) / 'grades'
+
+
+def archive_partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([('Examen', pa.string())]), flavor='hive')
+
+
+# Ajout des notes d'un examen à l'archive
+# `notes` : série des notes indexée par code (celle de split_scores).
+# Renvoie le nombre de notes archivées.
+def archive_notes(notes, exam, store=None, timestamp=None):
+    import uuid
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    timestamp = pd.Timestamp(timestamp or pd.Timestamp.now()).as_unit('us')
+    table = pa.table({
+        'Examen': pa.array([str(exam)] * len(notes), pa.string()),
+        'Code': pa.array(notes.index.astype(str), pa.string()),
+        'Note': pa.array(notes.to_numpy(dtype='float64'), pa.float64()),
+        'Horodatage': pa.array([timestamp] * len(notes), pa.timestamp('us')),
+    })
+
+    ds.write_dataset(table, archive_dir(store), format='parquet', partitioning=archive_partitioning(),
+                     basename_template=f"{timestamp:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+                     existing_data_behavior='overwrite_or_ignore')
+    return len(notes)
+
+
+# Lecture de l'archive, projetée en mémoire
+# Les filtres sur les examens et les codes sont appliqués par pyarrow : seuls
+# les répertoires des examens demandés sont ouverts. Avec `latest=True`, seule
+# la dernière intégration de chaque examen est conservée (une réintégration
+# après correction remplace la précédente).
+def read_archive(store=None, exams=None, codes=None, latest=True):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    path = archive_dir(store)
+    if not path.exists():
+        return pd.DataFrame({'Examen': pd.Categorical([]), 'Code': pd.Series(dtype=object),
+                             'Note': pd.Series(dtype='float64'), 'Horodatage': pd.Series(dtype='datetime64[us]')})
+
+    dataset = ds.dataset(path, format='parquet', partitioning=archive_partitioning(),
+                         filesystem=pa.fs.LocalFileSystem(use_mmap=True))
+
+    condition = None
+    if exams is not None:
+        condition = ds.field('Examen').isin([str(exam) for exam in exams])
+    if codes is not None:
+        selected = ds.field('Code').isin([str(code) for code in codes])
+        condition = selected if condition is None else condition & selected
+
+    grades = dataset.to_table(columns=ARCHIVE_COLUMNS, filter=condition).to_pandas()
+    if latest and not grades.empty:
+        last = grades.groupby('Examen')['Horodatage'].transform('max')
+        grades = grades[grades['Horodatage'] == last]
+
+    grades['Examen'] = grades['Examen'].astype('category')
+    return grades.sort_values(['Examen', 'Horodatage'], kind='stable').reset_index(drop=True)
+
+
+# Examens présents dans l'archive, sans lire les notes
+def archived_exams(store=None):
+    from urllib.parse import unquote
+
+    path = archive_dir(store)
+    if not path.exists():
+        return []
+    return sorted(unquote(part.name.split('=', 1)[1]) for part in path.glob('Examen=*') if part.is_dir())
@@ -1,24 +1,32 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
+from amccore import read_roster, export_data, frame_digest, EXPORT_FORMATS
+
+# Exports mis en cache par empreinte du résultat : seul le format choisi
+# est sérialisé, une seule fois par résultat
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_export(digest, _df, fmt):
+    return export_data(_df, fmt)
+
+# Lecture unique du fichier Excel de l'administration
+def load_roster(file):
+    try:
+        return read_roster(file)
+
+    except Exception as e:
+        st.error(f"Erreur lors du traitement du fichier Excel : {str(e)}")
+        st.info("Assurez-vous que le fichier est bien formaté et contient les colonnes requises.")
+        return None
 
 # Fonction de traitement pour le fichier Excel
-def process_excel(file):
+def process_excel(roster):
     try:
-        # Lire le fichier Excel sans header
-        xls = pd.read_excel(file, header=None)
-                
-        # Trouver l'index de la ligne d'en-tête
-        header_index = next((idx for idx, row in xls.iterrows() 
-                             if all(col in row.values for col in ['Code', 'Nom', 'Prénom'])), None)
-        
-        if header_index is None:
-            st.error("Les colonnes 'Code', 'Nom', 'Prénom' sont introuvables dans le fichier.")
+        if roster is None:
             return None, None
-        
-        # Redéfinir les en-têtes et supprimer les lignes précédentes
-        xls.columns = xls.iloc[header_index]
-        xls = xls.iloc[header_index + 1:].reset_index(drop=True)
+
+        # En-têtes déjà détectés lors de la lecture du fichier
+        xls = roster.data
         
         # Vérification si le fichier est vide après nettoyage
         if xls.empty:
@@ -45,9 +53,9 @@ def process_excel(file):
 
 
 # Fonction de traitement pour le fichier CSV
-def process_csv(excel_file, csv_file):
+def process_csv(roster, csv_file):
     try:
-        xls, liste = process_excel(excel_file) 
+        xls, liste = process_excel(roster) 
         
         csv = pd.read_csv(csv_file, delimiter=';', encoding='utf-8')
 
@@ -112,7 +120,7 @@ with tab1:
     
     if uploaded_excel_file is not None:
         with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            xls, liste = process_excel(uploaded_excel_file)
+            xls, liste = process_excel(load_roster(uploaded_excel_file))
             
             if xls is not None:
                 st.success(f"Lecture du fichier Excel réussie ! {len(xls)} étudiants trouvés.")  
@@ -156,12 +164,13 @@ with tab2:
 
     if uploaded_excel_file2 is not None:
         with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            xls, liste = process_excel(uploaded_excel_file2)
+            roster = load_roster(uploaded_excel_file2)
+            xls, liste = process_excel(roster)
 
     
     if uploaded_csv_file is not None and uploaded_excel_file2 is not None:
         with st.spinner("Intégration des notes aux étudiants..."):
-            csv_clean, df_merged, anomalies = process_csv(uploaded_excel_file2, uploaded_csv_file)
+            csv_clean, df_merged, anomalies = process_csv(roster, uploaded_csv_file)
 
             st.write("Aperçu de la base de données des étudiants :")
             st.write(xls.head(10))   
@@ -190,11 +199,13 @@ with tab2:
                 
             # Téléchargement des résultats
              
+            fmt = st.radio("Format du fichier final", list(EXPORT_FORMATS), horizontal=True)
+            extension, mime = EXPORT_FORMATS[fmt]
             st.download_button(
-                label="📥 Télécharger le fichier final des notes au format Excel",
-                data=df_merged.to_csv(index=False, sep=';'),
-                file_name="etudiants_avec_notes.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"#"text/csv"
+                label="📥 Télécharger le fichier final des notes",
+                data=cached_export(frame_digest(df_merged), df_merged, fmt),
+                file_name=f"etudiants_avec_notes.{extension}",
+                mime=mime
                 )
                 
             if len(anomalies) > 0:   
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
+from amccore import find_header_row, build_notes, NOTES_HEADERS
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Alignment, Font
 
@@ -11,10 +12,7 @@ def process_excel(file):
         xls = pd.read_excel(file, header=None)
                 
         # Trouver l'index de la ligne d'en-tête
-        header_index = next(
-            (idx for idx, row in xls.iterrows() if all(col in row.values for col in ['Code', 'Nom', 'Prénom'])),
-            None
-        )
+        header_index = find_header_row(xls)
         
         if header_index is None:
             st.error("Les colonnes 'Code', 'Nom', 'Prénom' sont introuvables dans le fichier.")
@@ -62,8 +60,8 @@ def process_csv(csv_file):
             st.error("Aucune donnée valide après le nettoyage !")
             return None, None, None
         
-        # Construire le dictionnaire Notes
-        Notes = {row['A:Code'].strip().upper(): row['Note'] for _, row in csv_clean.iterrows()}
+        # Construire la série Notes indexée par code normalisé
+        Notes = build_notes(csv_clean)
         
         return csv_clean, anomalies, Notes
     
@@ -77,11 +75,7 @@ def update_excel_with_notes(file_path, notes):
         df = pd.read_excel(file_path, header=None)
         
         # Identifier la ligne contenant les en-têtes
-        header_row = None
-        for i, row in df.iterrows():
-            if set(['Code', 'CNE', 'Nom', 'Prénom', 'DATE_NAI_IND', 'Groupe', 'N° Exam', 'Note']).issubset(row.dropna().astype(str).str.strip()):
-                header_row = i
-                break
+        header_row = find_header_row(df, NOTES_HEADERS, strip=True)
         
         if header_row is None:
             st.error("Les en-têtes attendus n'ont pas été trouvés dans le fichier Excel.")
@@ -99,7 +93,7 @@ def update_excel_with_notes(file_path, notes):
         # Nettoyer la colonne 'Code' pour faciliter la correspondance
         data_rows['Code'] = data_rows['Code'].astype(str).str.strip().str.upper()
         
-        # Mettre à jour la colonne 'Note' avec les valeurs du dictionnaire 'Notes'
+        # Mettre à jour la colonne 'Note' avec les valeurs de la série 'Notes'
         data_rows['Note'] = data_rows['Code'].map(notes)
         
         # Remplacer les lignes modifiées dans le DataFrame original
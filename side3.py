@@ -1,31 +1,143 @@
+import os
 import streamlit as st
 import pandas as pd
+import numpy as np
 from io import BytesIO
+from amccore import (read_roster, split_scores, merge_notes, patch_workbook, write_excel, frame_digest,
+                     content_digest, detect_anomalies, anomaly_counts, ANOMALY_LABELS, SCORES_CHUNKSIZE)
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Alignment, Font
 import plotly.express as px
 import plotly.graph_objects as go
+from amcstats import GradeHistogram, what_if, what_if_table, load_exams, exam_summary, read_question_scores, item_analysis
+from amcmatch import suggest_codes
+from amcproject import open_scores
+from amcprofile import Profiler
+from amcstore import read_roster_stored, archive_notes, read_archive, archived_exams
+
+
+# Dépôt local (listes d'étudiants et archive des notes), désactivé par
+# défaut : ces données personnelles ne sont conservées sur le serveur que si
+# la variable d'environnement AMCPY_STORE donne son répertoire
+STORE = os.environ.get('AMCPY_STORE')
+
+
+# Lectures mises en cache, indexées par l'empreinte du contenu des fichiers :
+# les réexécutions de Streamlit (slider, onglets...) et les téléversements
+# répétés d'un même fichier ne relisent rien.
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_roster(digest, _data):
+    # Avec le dépôt local, le même fichier (qui revient à chaque examen du
+    # module) n'est analysé qu'une fois, puis rechargé depuis le dépôt
+    if STORE:
+        return read_roster_stored(BytesIO(_data), digest=digest, store=STORE)
+    return read_roster(BytesIO(_data), digest=digest)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_scores(digest, _data, duplicates='last', engine='c'):
+    # Le moteur pyarrow lit tout le fichier d'un coup (pas de lecture par blocs)
+    chunksize = None if engine == 'pyarrow' else SCORES_CHUNKSIZE
+    # Export CSV, ou projet AMC zippé (bases SQLite du répertoire data/)
+    return split_scores(open_scores(BytesIO(_data), chunksize=chunksize, engine=engine), duplicates)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_merge(roster_digest, _roster, notes):
+    return merge_notes(_roster, notes)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def grade_histogram(notes):
+    return GradeHistogram(notes)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def grade_what_if(notes):
+    return what_if(notes), what_if_table(notes).to_csv(index=False, sep=';').encode('utf-8')
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_items(digest, _data):
+    return item_analysis(read_question_scores(BytesIO(_data)))
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_exams(digests, _files):
+    return load_exams(dict(zip(digests, _files)))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_suggestions(roster_digest, _roster, anomalies, csv_clean):
+    return suggest_codes(anomalies, _roster, csv_clean)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_excel(digest, _df):
+    output = BytesIO()
+    write_excel(_df, output)
+    return output.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_patch(digest, _data, notes):
+    output = BytesIO()
+    patch_workbook(BytesIO(_data), notes, output)
+    return output.getvalue()
+
+# Squelette du graphique des effectifs : une barre par classe de note, mise
+# en page construite une seule fois. La taille du graphique envoyé au
+# navigateur ne dépend pas du nombre de copies.
+@st.cache_resource
+def histogram_skeleton(n_bins, bin_width):
+    fig = go.Figure(go.Bar(x=np.arange(n_bins) * bin_width, y=np.zeros(n_bins, dtype=int)))
+
+    # Personnalisation du layout
+    fig.update_layout(
+        title=" ",
+        title_font_size=20,
+        xaxis_title="Notes",
+        yaxis_title="Effectifs",
+        xaxis_title_font=dict(size=14),
+        yaxis_title_font=dict(size=14),
+        showlegend=False,
+        width=800,
+        height=600
+    )
+
+    # Ajuster la position et le style des étiquettes
+    fig.update_traces(textfont_size=14, textangle=0, textposition="outside", width=bin_width * 0.8)
+    fig.update_xaxes(tickmode='array', tickvals=list(range(21)), ticktext=[str(i) for i in range(21)])
+    return fig
+
+# Graphique des effectifs après ajout de `bonus` points
+def histogram_figure(hist, bonus=0):
+    counts = hist.shifted(bonus)
+    fig = go.Figure(histogram_skeleton(hist.n_bins, hist.bin_width))
+    fig.update_traces(y=counts, text=np.where(counts > 0, counts.astype(str), ''))
+    return fig
+
+# Libellés distincts : un nom déjà pris reçoit un suffixe ('notes.csv (2)')
+def unique_labels(names):
+    labels = []
+    for name in names:
+        label, n = name, 1
+        while label in labels:
+            n += 1
+            label = f"{name} ({n})"
+        labels.append(label)
+    return labels
+
+# Lecture unique du fichier Excel de l'administration
+def load_roster(file):
+    try:
+        data = file.getvalue()
+        return cached_roster(content_digest(data), data)
 
+    except Exception as e:
+        st.error(f"Erreur lors du traitement du fichier Excel : {str(e)}")
+        st.info("Assurez-vous que le fichier est bien formaté et contient les colonnes requises.")
+        return None
 
 # Fonction de traitement pour le fichier Excel
-def process_excel(file):
+def process_excel(roster):
     try:
-        # Lire le fichier Excel sans header
-        xls = pd.read_excel(file, header=None)
-                
-        # Trouver l'index de la ligne d'en-tête
-        header_index = next(
-            (idx for idx, row in xls.iterrows() if all(col in row.values for col in ['Code', 'Nom', 'Prénom'])),
-            None
-        )
-        
-        if header_index is None:
-            st.error("Les colonnes 'Code', 'Nom', 'Prénom' sont introuvables dans le fichier.")
+        if roster is None:
             return None, None
-        
-        # Redéfinir les en-têtes et supprimer les lignes précédentes
-        xls.columns = xls.iloc[header_index]
-        xls = xls.iloc[header_index + 1:].reset_index(drop=True)
+
+        # En-têtes déjà détectés lors de la lecture du fichier
+        xls = roster.data
         
         # Vérification si le fichier est vide après nettoyage
         if xls.empty:
@@ -48,79 +160,35 @@ def process_excel(file):
     except Exception as e:
         st.error(f"Erreur lors du traitement du fichier Excel : {str(e)}")
         st.info("Assurez-vous que le fichier est bien formaté et contient les colonnes requises.")
-        return None, 
+        return None, None
 
 # Fonction de traitement pour le fichier CSV
-def process_csv(csv_file):
+def process_csv(csv_file, duplicates='last', engine='c'):
     try:
-        # Lire le fichier CSV
-        csv = pd.read_csv(csv_file, delimiter=';', encoding='utf-8')
-        
-        # Nettoyer les données : supprimer les lignes où 'A:Code' == 'NONE'
-        anomalies = csv[csv['A:Code'] == 'NONE'].copy()
-        csv_clean = csv[csv['A:Code'] != 'NONE'].copy()
-        
-        # Vérifier si le fichier nettoyé est vide
-        if csv_clean.empty:
-            st.error("Aucune donnée valide après le nettoyage !")
-            return None, None, None
-        
-        # Construire le dictionnaire Notes
-        Notes = {row['A:Code'].strip().upper(): row['Note'] for _, row in csv_clean.iterrows()}
-        
-        return csv_clean, anomalies, Notes
+        data = csv_file.getvalue()
+        return cached_scores(content_digest(data), data, duplicates, engine)
     
     except Exception as e:
         st.error(f"Erreur lors du traitement du fichier CSV : {str(e)}")
         return None, None, None
 
-def update_excel_with_notes(file_path, notes):
+def update_excel_with_notes(roster, notes):
     try:
-        # Lire le fichier Excel sans supposer les en-têtes
-        df = pd.read_excel(file_path, header=None)
-        
-        # Identifier la ligne contenant les en-têtes
-        header_row = None
-        for i, row in df.iterrows():
-            if set(['Code', 'CNE', 'Nom', 'Prénom', 'DATE_NAI_IND', 'Groupe', 'N° Exam', 'Note']).issubset(row.dropna().astype(str).str.strip()):
-                header_row = i
-                break
-        
-        if header_row is None:
-            st.error("Les en-têtes attendus n'ont pas été trouvés dans le fichier Excel.")
-        
-        # Créer une copie du DataFrame pour conserver toutes les lignes
-        updated_df = df.copy()
-        
-        # Définir les en-têtes correctement (nettoyage des espaces)
-        updated_df.columns = [col.strip() if isinstance(col, str) else f"Unnamed_{j}" for j, col in enumerate(updated_df.iloc[header_row])]
-        updated_df.columns = updated_df.columns.str.strip()  # Supprimer les espaces inutiles dans les noms de colonnes
-        
-        # Filtrer les lignes après les en-têtes
-        data_rows = updated_df.iloc[header_row + 1:].reset_index(drop=True)
-        
-        # Nettoyer la colonne 'Code' pour faciliter la correspondance
-        data_rows['Code'] = data_rows['Code'].astype(str).str.strip().str.upper()
-        
-        # Mettre à jour la colonne 'Note' avec les valeurs du dictionnaire 'Notes'
-        data_rows['Note'] = data_rows['Code'].map(notes)
-        
-        # Remplacer les lignes modifiées dans le DataFrame original
-        updated_df.iloc[header_row + 1:] = data_rows.values
-        
-        return updated_df
+        return cached_merge(roster.digest, roster, notes)
     
     except Exception as e:
         st.error(f"Erreur lors du traitement du fichier Excel : {str(e)}")
         return None
 
-def to_excel(df):
-    output = BytesIO()
-    writer = pd.ExcelWriter(output, engine='openpyxl')
-    df.to_excel(writer, index=False, sheet_name='Feuille1', header=False)
-    writer.close()
-    processed_data = output.getvalue()
-    return processed_data
+# Notes écrites dans le classeur d'origine (mise en forme conservée)
+def patch_excel_with_notes(file, notes):
+    try:
+        data = file.getvalue()
+        return cached_patch(content_digest(data), data, notes)
+    
+    except Exception as e:
+        st.error(f"Erreur lors du traitement du fichier Excel : {str(e)}")
+        return None
 
 
 
@@ -128,7 +196,17 @@ def to_excel(df):
 st.title("Traitements de fichiers Excel et CSV pour AMC")
 
 # Sidebar pour les sections
-section = st.sidebar.radio("Choisir une section", ["Liste des étudiants", "Traitement des notes", "Statistiques"])
+section = st.sidebar.radio("Choisir une section", ["Liste des étudiants", "Traitement des notes", "Statistiques", "Comparaison des examens"])
+
+# Mesures par étape de chaque réexécution (durées toujours journalisées,
+# mémoire mesurée seulement si le panneau est affiché)
+show_profile = st.sidebar.toggle("Mesures de performance")
+profiler = Profiler(memory=show_profile, context={'section': section})
+
+# Moteur de lecture du CSV d'AMC : pyarrow lit le fichier d'un bloc, en
+# parallèle (plus rapide sur les gros exports, plus gourmand en mémoire)
+csv_engine = st.sidebar.selectbox("Lecture du CSV des notes", ['c', 'pyarrow'],
+                                  format_func={'c': "pandas (par blocs)", 'pyarrow': "pyarrow"}.get)
 
 if section == "Liste des étudiants":
     st.header("Préparation de la liste des étudiants")
@@ -149,7 +227,7 @@ if section == "Liste des étudiants":
     
     if uploaded_excel_file is not None:
         with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            xls, liste = process_excel(uploaded_excel_file)
+            xls, liste = process_excel(load_roster(uploaded_excel_file))
             
             if xls is not None:
                 st.success(f"Lecture du fichier Excel réussie ! {len(xls)} étudiants trouvés.")  
@@ -183,16 +261,21 @@ elif section == "Traitement des notes":
         key="excel_uploader2"
     )
     uploaded_csv_file = st.file_uploader(
-        "Télécharger le fichier CSV des notes calculées par AMC", 
-        type="csv", 
+        "Télécharger le fichier CSV des notes calculées par AMC (ou le répertoire data/ du projet AMC, zippé)", 
+        type=["csv", "zip"], 
         key="csv_uploader"
     )
     if uploaded_excel_file2 is not None:
         with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            xls, liste = process_excel(uploaded_excel_file2)
+            with profiler.stage('read_roster') as stage:
+                roster = load_roster(uploaded_excel_file2)
+                stage['rows'] = len(roster) if roster is not None else None
+            xls, liste = process_excel(roster)
     if uploaded_csv_file is not None and uploaded_excel_file2 is not None:
         with st.spinner("Intégration des notes aux étudiants..."):
-            csv_clean, anomalies, Notes = process_csv(uploaded_csv_file)
+            with profiler.stage('process_csv') as stage:
+                csv_clean, anomalies, Notes = process_csv(uploaded_csv_file, engine=csv_engine)
+                stage['rows'] = len(csv_clean) if csv_clean is not None else None
             st.write("Aperçu de la base de données des étudiants :")
             st.write(xls.head(10))
             
@@ -202,7 +285,8 @@ elif section == "Traitement des notes":
             # Générer le fichier Excel final avec en-tête personnalisé
             if Notes is not None:
                 # Mettre à jour le fichier Excel avec les notes
-                updated_df = update_excel_with_notes(uploaded_excel_file2, Notes)
+                with profiler.stage('update_excel_with_notes', rows=len(Notes)):
+                    updated_df = update_excel_with_notes(roster, Notes)
     
             if updated_df is not None:
                 # Afficher le DataFrame mis à jour
@@ -210,19 +294,82 @@ elif section == "Traitement des notes":
                 st.write(updated_df)
                 # Exporter le résultat dans un nouveau fichier Excel
 
-                processed_data = to_excel(updated_df)
+                # Classeur mis en cache : les réexécutions ne le réécrivent pas
+                with profiler.stage('to_excel', rows=len(updated_df)):
+                    processed_data = cached_excel(frame_digest(updated_df), updated_df)
                 st.download_button(
-                label="📥 Télécharger le fichier final des notes au format Excel",
-                data=processed_data,
-                file_name="etudiants_avec_notes.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+                    label="📥 Télécharger le fichier final des notes au format Excel",
+                    data=processed_data,
+                    file_name="etudiants_avec_notes.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+
+                # Même fichier, avec la mise en forme de l'administration : le
+                # classeur complet n'est rechargé et réécrit que sur demande
+                if st.checkbox("Préparer le fichier de l'administration complété (mise en forme conservée)"):
+                    with profiler.stage('patch_excel_with_notes', rows=len(Notes)):
+                        patched_data = patch_excel_with_notes(uploaded_excel_file2, Notes)
+                    if patched_data is not None:
+                        st.download_button(
+                            label="📥 Télécharger le fichier de l'administration complété (mise en forme conservée)",
+                            data=patched_data,
+                            file_name="etudiants_avec_notes_original.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        )
+
+                # Simulation des bonus et des seuils pour le jury
+                _, what_if_csv = grade_what_if(csv_clean['Note'])
+                st.download_button(
+                    label="📥 Télécharger la simulation des bonus au format CSV",
+                    data=what_if_csv,
+                    file_name="simulation_bonus.csv",
+                    mime="text/csv"
+                )
+
+                # Archivage des notes pour les statistiques historiques
+                if STORE:
+                    exam_id = st.text_input("Identifiant de l'examen à archiver",
+                                            value=uploaded_csv_file.name.rsplit('.', 1)[0])
+                    if st.button("🗄️ Archiver les notes") and exam_id:
+                        try:
+                            st.success(f"{archive_notes(Notes, exam_id, STORE)} notes archivées pour l'examen {exam_id}.")
+                        except Exception as e:
+                            st.error(f"Erreur lors de l'archivage des notes : {str(e)}")
             else:
                st.error("La mise à jour du fichier Excel a échoué.")
             
         if len(anomalies) > 0:   
             st.warning(f"Attention! {len(anomalies)} étudiants ont été mal identifiés. Vérifiez leurs copies.")
 
+            # Codes proposés d'après le nom lu par AMC, parmi les étudiants
+            # dont aucune copie identifiée n'a été trouvée
+            suggestions = cached_suggestions(roster.digest, roster, anomalies, csv_clean)
+            if not suggestions.empty:
+                with st.expander(f"Codes proposés pour les copies mal identifiées ({suggestions['Copie'].nunique()} copies)"):
+                    st.dataframe(suggestions, hide_index=True)
+                    st.download_button(
+                        label="📥 Télécharger les codes proposés",
+                        data=suggestions.to_csv(index=False, sep=';').encode('utf-8'),
+                        file_name="codes_proposes.csv",
+                        mime="text/csv"
+                    )
+
+        # Rapport détaillé des anomalies de toutes les copies
+        if csv_clean is not None and roster is not None:
+            with profiler.stage('detect_anomalies') as stage:
+                report = detect_anomalies(pd.concat([csv_clean, anomalies]).sort_index(), roster)
+                stage['rows'] = len(report)
+            if not report.empty:
+                with st.expander(f"Rapport des anomalies ({len(report)} copies)"):
+                    st.write(anomaly_counts(report))
+                    st.dataframe(report.drop(columns=list(ANOMALY_LABELS)))
+                    st.download_button(
+                        label="🚨 Télécharger le rapport des anomalies",
+                        data=report.to_csv(index=False, sep=';').encode('utf-8'),
+                        file_name="anomalies.csv",
+                        mime="text/csv"
+                    )
+
 elif section == "Statistiques":
     st.header("Statistiques des notes")
     st.info(
@@ -239,22 +386,31 @@ elif section == "Statistiques":
         key="excel_uploader2"
     )
     uploaded_csv_file = st.file_uploader(
-        "Télécharger le fichier CSV des notes calculées par AMC", 
-        type="csv", 
+        "Télécharger le fichier CSV des notes calculées par AMC (ou le répertoire data/ du projet AMC, zippé)", 
+        type=["csv", "zip"], 
         key="csv_uploader"
     )
     if uploaded_excel_file2 is not None:
         with st.spinner("Traitement automatique du fichier Excel en cours..."):
-            xls, liste = process_excel(uploaded_excel_file2)
+            with profiler.stage('read_roster') as stage:
+                roster = load_roster(uploaded_excel_file2)
+                stage['rows'] = len(roster) if roster is not None else None
+            xls, liste = process_excel(roster)
     if uploaded_csv_file is not None and uploaded_excel_file2 is not None:
         with st.spinner("Intégration des notes aux étudiants..."):
-            csv_clean, anomalies, Notes = process_csv(uploaded_csv_file)
+            with profiler.stage('process_csv') as stage:
+                csv_clean, anomalies, Notes = process_csv(uploaded_csv_file, engine=csv_engine)
+                stage['rows'] = len(csv_clean) if csv_clean is not None else None
                 
             # Générer le fichier Excel final avec en-tête personnalisé
             if Notes is not None:
                 # Mettre à jour le fichier Excel avec les notes
-                updated_df = update_excel_with_notes(uploaded_excel_file2, Notes)
+                with profiler.stage('update_excel_with_notes', rows=len(Notes)):
+                    updated_df = update_excel_with_notes(roster, Notes)
 
+            # Histogramme des notes, calculé une fois pour tous les bonus
+            with profiler.stage('grade_histogram', rows=len(csv_clean)):
+                hist = grade_histogram(csv_clean['Note'])
 
             # Affichage des statistiques
             col1, col2, col3, col4 = st.columns(4)
@@ -263,41 +419,14 @@ elif section == "Statistiques":
             with col2:
                 st.metric("Présents", len(csv_clean) if csv_clean is not None else 0)
             with col3:
-                st.metric("Taux de réussite (%)", round((csv_clean['Note'] >= 10).mean()*100,2)
+                st.metric("Taux de réussite (%)", round(hist.pass_rate(), 2)
  if xls is not None and csv_clean is not None else 0)
             with col4:
                 st.metric("Mal identifiés", len(anomalies) if anomalies is not None else 0)
 
 
-            # Calcul des effectifs
-            effectifs = csv_clean['Note'].value_counts().reset_index()#.sort_index()
-            modalites = csv_clean['Note'].unique()
-            effectifs.columns = ['Valeur', 'Effectif']
-
-
-            # Création du graphique Plotly avec les effectifs affichés sur les barres
-            fig = px.bar(effectifs,
-                x='Valeur',
-                y='Effectif',
-                title=" ",
-                labels={'Valeur': 'Notes', 'Effectif': 'Effectifs'},
-                text_auto=True 
-            )
-
-            # Personnalisation du layout
-            fig.update_layout(
-                title_font_size=20,
-                xaxis_title_font=dict(size=14),
-                yaxis_title_font=dict(size=14),
-                showlegend=False
-            )
-
-            # Ajuster la position et le style des étiquettes (optionnel)
-            fig.update_traces(textfont_size=14, textangle=0, textposition="outside", width=0.5)
-            fig.update_xaxes(tickmode='array', tickvals=list(range(21)), ticktext=[str(i) for i in range(21)])
-            fig.update_layout(width=800, height=600)
-
-            st.plotly_chart(fig)
+            # Graphique des effectifs par classe de note
+            st.plotly_chart(histogram_figure(hist))
 
             cola, colb = st.columns(2)
             with cola:
@@ -305,48 +434,61 @@ elif section == "Statistiques":
                 ajout_points = st.slider("Ajouter des points", min_value=0.0, max_value=5.0, value=0.0, step=0.5)
 
             if ajout_points > 0:
-                csv_plus = csv_clean.copy()
-
-                # Ajout des points avec validation (limite maximale de 20)
-                csv_plus['Note'] = csv_plus['Note'].apply(lambda x: min(x + ajout_points, 20))
-
-                # Calcul des effectifs après modification
-                effectifs_plus = csv_plus['Note'].value_counts().reset_index()
-                effectifs_plus.columns = ['Valeur', 'Effectif']
-
-                # Création du graphique Plotly avec les effectifs affichés sur les barres
-                fig_plus = px.bar(
-                    effectifs_plus,
-                    x='Valeur',
-                    y='Effectif',
-                    title=" ",
-                    labels={'Valeur': 'Notes', 'Effectif': 'Effectifs'},
-                    text_auto=True
-                )
-
-                # Personnalisation du layout
-                fig_plus.update_layout(
-                    title_font_size=20,
-                    xaxis_title_font=dict(size=14),
-                    yaxis_title_font=dict(size=14),
-                    showlegend=False
-                )
-
-                # Ajuster la position et le style des étiquettes
-                fig_plus.update_traces(textfont_size=14, textangle=0, textposition="outside", width=0.5)
-
-                # Configuration de l'axe des abscisses pour inclure toutes les valeurs de 0 à 20
-                fig_plus.update_xaxes(tickmode='array', tickvals=list(range(21)), ticktext=[str(i) for i in range(21)])
-
-                # Définir la taille du graphique
-                fig_plus.update_layout(width=800, height=600)
-
                 # Affichage du taux de réussite mis à jour
                 with colb:
-                    st.metric("Nouveau taux de réussite (%)", round((csv_plus['Note'] >= 10).mean() * 100, 2))
+                    st.metric("Nouveau taux de réussite (%)", round(hist.pass_rate(ajout_points), 2))
+
+                # Effectifs après ajout des points (limite maximale de 20) : seules
+                # les données des barres changent, la mise en page est réutilisée
+                st.plotly_chart(histogram_figure(hist, ajout_points))
+
+            # Simulation : taux de réussite pour chaque bonus et chaque seuil
+            st.subheader("Taux de réussite (%) selon le bonus et le seuil")
+            (rates, means), what_if_csv = grade_what_if(csv_clean['Note'])
+            fig_grid = px.imshow(
+                rates.T,
+                labels={'x': 'Bonus', 'y': 'Seuil de réussite', 'color': 'Taux de réussite (%)'},
+                text_auto='.1f',
+                aspect='auto',
+                origin='lower',
+                color_continuous_scale='RdYlGn'
+            )
+            fig_grid.update_layout(width=800, height=500)
+            st.plotly_chart(fig_grid)
+
+            st.download_button(
+                label="📥 Télécharger la simulation au format CSV",
+                data=what_if_csv,
+                file_name="simulation_bonus.csv",
+                mime="text/csv"
+            )
 
-                # Affichage du graphique
-                st.plotly_chart(fig_plus)
+            # Analyse des questions (colonnes de score par question de l'export)
+            data = uploaded_csv_file.getvalue()
+            with profiler.stage('item_analysis') as stage:
+                items = cached_items(content_digest(data), data)
+                stage['rows'] = len(items)
+            if not items.empty:
+                st.subheader("Analyse des questions")
+                st.dataframe(items)
+
+                fig_items = px.imshow(
+                    items[['Difficulté', 'Discrimination']].T,
+                    labels={'x': 'Question', 'y': 'Indicateur', 'color': 'Valeur'},
+                    aspect='auto',
+                    zmin=-1,
+                    zmax=1,
+                    color_continuous_scale='RdYlGn'
+                )
+                fig_items.update_layout(width=800, height=300)
+                st.plotly_chart(fig_items)
+
+                st.download_button(
+                    label="📥 Télécharger l'analyse des questions au format CSV",
+                    data=items.to_csv(sep=';').encode('utf-8'),
+                    file_name="analyse_questions.csv",
+                    mime="text/csv"
+                )
 
 
 
@@ -361,4 +503,75 @@ elif section == "Statistiques":
             #    file_name="etudiants_avec_notes.xlsx",
             #    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             #)
-            
\ No newline at end of file
+
+    # Historique : examens archivés lors des sessions précédentes
+    exams = archived_exams(STORE) if STORE else []
+    if exams:
+        st.subheader("Historique des examens archivés")
+        selected = st.multiselect("Examens", exams, default=exams[-5:])
+        if selected:
+            history = read_archive(STORE, exams=selected)
+            st.dataframe(exam_summary(history))
+
+            fig_history = px.box(history, x='Examen', y='Note', labels={'Examen': 'Examens', 'Note': 'Notes'})
+            fig_history.add_hline(y=10, line_dash="dash")
+            fig_history.update_layout(width=800, height=600, showlegend=False)
+            st.plotly_chart(fig_history)
+
+        code = st.text_input("Notes archivées d'un étudiant (code)")
+        if code:
+            st.dataframe(read_archive(STORE, codes=[code.strip().upper()], latest=False), hide_index=True)
+
+elif section == "Comparaison des examens":
+    st.header("Comparaison des examens")
+    st.info(
+        """
+        - Télécharger les fichiers CSV des notes calculées par AMC (un par module ou par groupe).
+        - Les statistiques sont calculées pour chaque examen et pour l'ensemble.
+        """
+    )
+    uploaded_csv_files = st.file_uploader(
+        "Télécharger les fichiers CSV des notes calculées par AMC (ou les projets AMC zippés)", 
+        type=["csv", "zip"], 
+        accept_multiple_files=True,
+        key="csv_uploader_multi"
+    )
+    if uploaded_csv_files:
+        with st.spinner("Lecture des fichiers de notes..."):
+            data = [uploaded.getvalue() for uploaded in uploaded_csv_files]
+            with profiler.stage('load_exams', rows=len(data)):
+                grades, anomalies, errors = cached_exams(
+                    tuple(content_digest(content) for content in data),
+                    [BytesIO(content) for content in data]
+                )
+            # Les examens sont identifiés par le nom de leur fichier
+            names = {content_digest(content): uploaded.name for content, uploaded in zip(data, uploaded_csv_files)}
+            names = dict(zip(names, unique_labels(names.values())))
+            grades = grades.assign(Examen=grades['Examen'].cat.rename_categories(names))
+            anomalies = anomalies.rename(index=names)
+            anomalies['Ensemble'] = anomalies.sum()
+
+        for digest, error in errors.items():
+            st.error(f"Erreur lors du traitement du fichier {names[digest]} : {error}")
+
+        if not grades.empty:
+            summary = exam_summary(grades).join(anomalies)
+            st.dataframe(summary)
+            st.download_button(
+                label="📥 Télécharger les statistiques au format CSV",
+                data=summary.to_csv(sep=';').encode('utf-8'),
+                file_name="statistiques_examens.csv",
+                mime="text/csv"
+            )
+
+            # Distribution des notes par examen
+            fig_exams = px.box(grades, x='Examen', y='Note', labels={'Examen': 'Examens', 'Note': 'Notes'})
+            fig_exams.add_hline(y=10, line_dash="dash")
+            fig_exams.update_layout(width=800, height=600, showlegend=False)
+            st.plotly_chart(fig_exams)
+
+# Panneau des mesures et journal JSON de la réexécution
+if show_profile:
+    with st.sidebar.expander("Mesures de la dernière exécution", expanded=True):
+        st.dataframe(profiler.to_frame(), hide_index=True)
+profiler.log()
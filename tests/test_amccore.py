@@ -0,0 +1,94 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from amccore import (NOTES_HEADERS, code_keys, align_keys, read_roster, split_scores, merge_notes,
+                     patch_workbook, detect_anomalies, ROSTER_READERS)
+
+
+# Classeur de l'administration : une ligne de titre, l'en-tête, puis les étudiants
+def roster_workbook(codes):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Liste des étudiants'])
+    sheet.append(NOTES_HEADERS)
+    for i, code in enumerate(codes):
+        sheet.append([code, f"CNE{i}", f"Nom{i}", f"Prénom{i}", '01/01/2000', 'G1', i + 1, None])
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def scores(codes, notes):
+    return pd.DataFrame({'A:Code': codes, 'Code': codes, 'Nom': 'x', 'Note': notes})
+
+
+def merged_notes(merged):
+    body = merged.iloc[2:]
+    return dict(zip(body['Code'], body['Note']))
+
+
+def test_code_keys_integer_when_all_numeric():
+    keys = code_keys(pd.Series(['00123', ' 456', None], dtype=object))
+    assert keys.dtype == 'Int64'
+    assert keys.tolist()[:2] == [123, 456] and keys.isna().tolist() == [False, False, True]
+
+
+def test_code_keys_text_fallback_drops_leading_zeros():
+    keys = code_keys(pd.Series(['00123', 'abc', '000']))
+    assert keys.tolist() == ['123', 'ABC', '0']
+
+
+def test_align_keys_matches_leading_zeros_across_fallback():
+    left, right = align_keys(code_keys(pd.Series(['00123', '456'])), code_keys(pd.Series(['00123', 'ABC'])))
+    assert left.isin(right).tolist() == [True, False]
+
+
+@pytest.mark.parametrize('other', ['ABC', np.nan])
+@pytest.mark.parametrize('engine', ['pandas', *ROSTER_READERS])
+def test_merge_mixed_and_leading_zero_codes(engine, other):
+    data = roster_workbook(['00123', '456'])
+    roster = read_roster(BytesIO(data), engine=engine)
+    _, _, notes = split_scores(scores(['00123', '456', other], [12.0, 15.0, 9.0]))
+
+    assert merged_notes(merge_notes(roster, notes)) == {'00123': 12.0, '456': 15.0}
+
+    output = BytesIO()
+    assert patch_workbook(BytesIO(data), notes, output) == 2
+    sheet = load_workbook(output).worksheets[0]
+    assert [row[7] for row in sheet.iter_rows(min_row=3, values_only=True)] == [12.0, 15.0]
+
+
+def test_anomalies_with_mixed_codes():
+    roster = read_roster(BytesIO(roster_workbook(['00123', '456'])))
+    report = detect_anomalies(scores(['00123', '456', 'ABC'], [12.0, 15.0, 9.0]), roster)
+    assert report['A:Code'].tolist() == ['ABC']
+    assert bool(report['non_numeric'].iloc[0]) and bool(report['absent'].iloc[0])
+
+
+@pytest.mark.parametrize('duplicates, expected', [('last', {'123': 12.0}), ('first', {'00123': 10.0}), ('flag', {})])
+def test_duplicates_on_join_keys(duplicates, expected):
+    csv_clean, anomalies, notes = split_scores(scores(['00123', '123', '456'], [10.0, 12.0, 8.0]), duplicates)
+    assert notes.drop('456').to_dict() == expected
+    assert len(anomalies) == (2 if duplicates == 'flag' else 0)
+
+
+@pytest.mark.parametrize('engine', ROSTER_READERS)
+def test_readers_keep_sheet_columns(engine):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet['C2'] = 'Liste des étudiants'
+    for r, row in enumerate([NOTES_HEADERS, ['00123', 'c', 'n', 'p', 'd', 'g', 1, None]], start=4):
+        for c, value in enumerate(row, start=2):
+            sheet.cell(r, c, value)
+    output = BytesIO()
+    workbook.save(output)
+
+    expected = read_roster(BytesIO(output.getvalue()), engine='pandas')
+    roster = read_roster(BytesIO(output.getvalue()), engine=engine)
+    assert roster.raw.shape == expected.raw.shape == (5, 9)
+    assert roster.header_index == expected.header_index
+    assert list(roster.header) == [None, *NOTES_HEADERS]
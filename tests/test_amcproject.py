@@ -0,0 +1,59 @@
+import sqlite3
+import zipfile
+
+import pytest
+
+from amcbench import make_amc_project
+from amccore import split_scores
+from amcproject import open_scores, read_project_questions
+
+
+@pytest.fixture
+def project(tmp_path):
+    data_dir = make_amc_project(tmp_path / 'projet', 50, n_questions=5, none_rate=0.2, seed=1)
+    with sqlite3.connect(data_dir / 'association.sqlite') as association:
+        # Association manuelle de la copie 1, qui l'emporte sur l'automatique
+        association.execute("UPDATE association_association SET manual = '999999' WHERE student = 1")
+        identified = association.execute("SELECT COUNT(*) FROM association_association").fetchone()[0]
+    return tmp_path / 'projet', identified
+
+
+@pytest.fixture
+def project_zip(project, tmp_path):
+    root, _ = project
+    path = tmp_path / 'projet.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        for file in root.rglob('*.sqlite'):
+            archive.write(file, file.relative_to(root.parent))
+    return path
+
+
+@pytest.mark.parametrize('source', ['directory', 'zip_path', 'zip_file'])
+def test_open_scores_project(project, project_zip, source):
+    root, identified = project
+    if source == 'directory':
+        csv = open_scores(root)
+    elif source == 'zip_path':
+        csv = open_scores(project_zip)
+    else:
+        with open(project_zip, 'rb') as file:
+            csv = open_scores(file)
+
+    assert list(csv.columns) == ['A:Code', 'Code', 'Nom', 'Note']
+    assert len(csv) == 50
+
+    csv_clean, anomalies, notes = split_scores(csv)
+    assert len(csv_clean) == identified
+    assert len(anomalies) == 50 - identified
+    assert anomalies['A:Code'].eq('NONE').all()
+
+    # Association manuelle prioritaire ; le code lu reste celui de la feuille
+    first = csv.iloc[0]
+    assert first['A:Code'] == '999999' and first['Code'] == '100000'
+    assert notes.loc['999999'] == first['Note']
+
+
+def test_read_project_questions(project):
+    root, _ = project
+    scores = read_project_questions(root)
+    assert scores.shape == (50, 5)